@@ -0,0 +1,80 @@
+''' memory held per blocked send, recv and select, and per live context and timer,
+    in bytes and allocated blocks, measured with tracemalloc over N of them at once
+
+    $ python -m benchmarks.bench_alloc
+'''
+import gc
+import tracemalloc
+from typing import Any, Callable, List
+from pygoic import Background, Chan, Timer, WithCancel, do
+from pygoic.channel import _MutexGroup
+
+
+N = 10000
+
+
+def measure(op: Callable[[int], Any]) -> tuple:
+    held: List[Any] = []
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        for i in range(N):
+            held.append(op(i))
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    stats = after.compare_to(before, 'filename')
+    size = sum(stat.size_diff for stat in stats)
+    count = sum(stat.count_diff for stat in stats)
+    # leave out the list holding the results
+    size -= 8 * len(held)
+    return size / N, count / N
+
+
+async def blocked_send() -> tuple:
+    ch = Chan[int]()
+    return measure(ch._send_or_wait)
+
+
+async def blocked_recv() -> tuple:
+    ch = Chan[int]()
+    return measure(lambda i: ch._recv_wait())
+
+
+async def blocked_select() -> tuple:
+    ch1 = Chan[int]()
+    ch2 = Chan[int]()
+
+    def op(i: int) -> Any:
+        # what select allocates once no case is ready
+        ops = (ch1.case_recv(), ch2.case_recv())
+        group = _MutexGroup()
+        for id, case in enumerate(ops):
+            case.chan._recv_with_mutex(group, id)
+        return group
+
+    return measure(op)
+
+
+async def cancel_ctx() -> tuple:
+    def op(i: int) -> Any:
+        ctx, _ = WithCancel(Background())
+        ctx.done()
+        return ctx
+
+    return measure(op)
+
+
+async def timer() -> tuple:
+    return measure(lambda i: Timer(3600))
+
+
+def main():
+    for bench in (blocked_send, blocked_recv, blocked_select, cancel_ctx, timer):
+        size, count = do(bench())
+        print(f'{bench.__name__:16s} {size:8.1f} bytes/op   {count:6.2f} blocks/op')
+
+
+if __name__ == '__main__':
+    main()
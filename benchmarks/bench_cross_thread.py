@@ -0,0 +1,45 @@
+''' latency of handing an item from a plain thread to a goroutine
+
+    $ python -m benchmarks.bench_cross_thread
+'''
+import statistics
+import time
+from pygoic import Chan, do, go
+
+
+N = 2000
+
+
+def main():
+    ch = Chan[float]()
+    done = Chan[None]()
+    latencies = []
+
+    async def consume():
+        async for sent_at in ch:
+            latencies.append(time.perf_counter() - sent_at)
+        done.close()
+
+    go(consume())
+    time.sleep(0.01)
+    for _ in range(N):
+        while not ch.send_nowait(time.perf_counter()):
+            # wait for the goroutine to park in recv again
+            time.sleep(0)
+        # keep the loop idle between sends
+        time.sleep(0.0002)
+    ch.close()
+    do(done.recv())
+
+    latencies.sort()
+    us = [x * 1e6 for x in latencies]
+    print(
+        f'thread -> goroutine handoff ({len(us)} samples): '
+        f'p50 {statistics.median(us):.1f}us  '
+        f'p99 {us[int(len(us) * 0.99)]:.1f}us  '
+        f'max {us[-1]:.1f}us'
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+''' CPU-bound calls awaited from a goroutine, on the thread pool vs the process pool,
+    plus large bytes results coming back pickled vs through shared memory
+
+    $ python -m benchmarks.bench_delegate_process
+'''
+import asyncio
+import time
+from pygoic import delegate, delegate_process, do
+
+
+CALLS = 16
+BLOBS = 20
+REPEAT = 3
+
+
+def parse(n: int) -> int:
+    # a stand-in for parsing, pure python holding the GIL
+    total = 0
+    for i in range(n):
+        total += int(str(i * 7)) % 13
+    return total
+
+
+def blob(n: int) -> bytes:
+    return bytes(n)
+
+
+async def cpu(process: bool) -> float:
+    call = delegate_process if process else delegate
+    start = time.perf_counter()
+    await asyncio.gather(*(call(parse, 200000) for _ in range(CALLS)))
+    return time.perf_counter() - start
+
+
+async def large(n: int, shared: bool) -> float:
+    start = time.perf_counter()
+    for _ in range(BLOBS):
+        await delegate_process(blob, n, shared=shared)
+    return time.perf_counter() - start
+
+
+def main():
+    # start the workers before timing anything
+    do(delegate_process(parse, 1))
+    threads = min(do(cpu(False)) for _ in range(REPEAT))
+    processes = min(do(cpu(True)) for _ in range(REPEAT))
+    print(
+        f'{"cpu":10s} '
+        f'threads {CALLS / threads:8.1f} /s   '
+        f'processes {CALLS / processes:8.1f} /s   '
+        f'x{threads / processes:.2f}'
+    )
+    for n in (64 << 10, 256 << 10, 1 << 20, 16 << 20):
+        pickled = min(do(large(n, False)) for _ in range(REPEAT))
+        shared = min(do(large(n, True)) for _ in range(REPEAT))
+        print(
+            f'{n >> 10:6d} KiB   '
+            f'pickled {pickled / BLOBS * 1e3:8.2f} ms   '
+            f'shared {shared / BLOBS * 1e3:8.2f} ms   '
+            f'x{pickled / shared:.2f}'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+''' goroutines spawned on the loop and awaited, plain vs eager start, for ones finishing
+    without suspending (a cache hit, a send_nowait) and for ones suspending once
+
+    Eager start needs 3.12 or later, before that it is a plain start and there is
+    nothing to compare, so the benchmark only runs on 3.12+.
+
+    $ python -m benchmarks.bench_eager
+'''
+import asyncio
+import sys
+import time
+from typing import Any, Callable, Coroutine
+from pygoic import Chan, do, go
+
+
+N = 100000
+REPEAT = 5
+
+
+def cache_hit() -> Callable[[int], Coroutine[Any, Any, Any]]:
+    cache = {i: i for i in range(64)}
+
+    async def lookup(i: int) -> int:
+        return cache[i % 64]
+
+    return lookup
+
+
+def send_nowait() -> Callable[[int], Coroutine[Any, Any, Any]]:
+    ch = Chan[int](N)
+
+    async def send(i: int) -> bool:
+        return ch.send_nowait(i)
+
+    return send
+
+
+def suspending() -> Callable[[int], Coroutine[Any, Any, Any]]:
+    async def sleep(i: int) -> int:
+        await asyncio.sleep(0)
+        return i
+
+    return sleep
+
+
+async def spawn(make: Callable[[], Callable[[int], Coroutine[Any, Any, Any]]], eager: bool) -> float:
+    f = make()
+    start = time.perf_counter()
+    futures = [go(f(i), eager=eager) for i in range(N)]
+    for future in futures:
+        await future
+    return time.perf_counter() - start
+
+
+def main():
+    if sys.version_info < (3, 12):
+        print('eager start is a plain start before 3.12, skipped')
+        return
+    for make in (cache_hit, send_nowait, suspending):
+        plain = min(do(spawn(make, False)) for _ in range(REPEAT))
+        eager = min(do(spawn(make, True)) for _ in range(REPEAT))
+        print(
+            f'{make.__name__:12s} '
+            f'plain {N / plain:9.0f} /s   '
+            f'eager {N / eager:9.0f} /s   '
+            f'x{plain / eager:.2f}'
+        )
+
+
+if __name__ == '__main__':
+    main()
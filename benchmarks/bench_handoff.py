@@ -0,0 +1,63 @@
+''' ping-pong between two goroutines over unbuffered chans, plain vs handoff,
+    as round trip latency, plus a producer streaming to a consumer
+
+    $ python -m benchmarks.bench_handoff
+'''
+import time
+from pygoic import Chan, do, go
+
+
+N = 50000
+REPEAT = 5
+
+
+async def ping_pong(handoff: bool) -> float:
+    ping = Chan[int](handoff=handoff)
+    pong = Chan[int](handoff=handoff)
+
+    async def echo():
+        async for i in ping:
+            await pong.send(i)
+
+    go(echo())
+    start = time.perf_counter()
+    for i in range(N):
+        await ping.send(i)
+        await pong.recv()
+    elapsed = time.perf_counter() - start
+    ping.close()
+    return elapsed
+
+
+async def stream(handoff: bool) -> float:
+    ch = Chan[int](handoff=handoff)
+    done = Chan[None]()
+
+    async def consume():
+        async for _ in ch:
+            pass
+        await done.send(None)
+
+    go(consume())
+    start = time.perf_counter()
+    for i in range(N):
+        await ch.send(i)
+    ch.close()
+    await done.recv()
+    return time.perf_counter() - start
+
+
+def main():
+    for bench in (ping_pong, stream):
+        plain = min(do(bench(False)) for _ in range(REPEAT))
+        handoff = min(do(bench(True)) for _ in range(REPEAT))
+        print(
+            f'{bench.__name__:10s} '
+            f'plain {plain / N * 1e6:6.2f} us/op   '
+            f'handoff {handoff / N * 1e6:6.2f} us/op   '
+            f'x{plain / handoff:.2f}'
+        )
+
+
+if __name__ == '__main__':
+    main()
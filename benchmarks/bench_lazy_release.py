@@ -0,0 +1,71 @@
+''' blocking select over many chans, unlinking the waiters left on the other chans
+    under each chan's lock vs only if the lock is free, else leaving them to be swept
+
+    $ python -m benchmarks.bench_lazy_release
+'''
+import asyncio
+import threading
+import time
+from typing import List
+from pygoic import Chan, do, go, select
+
+
+N = 20000
+REPEAT = 5
+
+
+def make_chans(k: int, lazy: bool) -> List[Chan[int]]:
+    chans = [Chan[int]() for _ in range(k)]
+    for ch in chans:
+        ch._lazy_release = lazy
+    return chans
+
+
+async def same_loop(k: int, lazy: bool) -> float:
+    chans = make_chans(k, lazy)
+
+    async def produce():
+        for i in range(N):
+            await chans[i % k].send(i)
+
+    go(produce())
+    start = time.perf_counter()
+    for _ in range(N):
+        await select(*chans)
+    return time.perf_counter() - start
+
+
+async def cross_thread(k: int, lazy: bool) -> float:
+    chans = make_chans(k, lazy)
+
+    def produce():
+        async def f():
+            for i in range(N):
+                await chans[i % k].send(i)
+        asyncio.run(f())
+
+    t = threading.Thread(target=produce)
+    start = time.perf_counter()
+    t.start()
+    for _ in range(N):
+        await select(*chans)
+    elapsed = time.perf_counter() - start
+    t.join()
+    return elapsed
+
+
+def main():
+    for bench in (same_loop, cross_thread):
+        for k in (2, 16, 128):
+            eager = min(do(bench(k, False)) for _ in range(REPEAT))
+            lazy = min(do(bench(k, True)) for _ in range(REPEAT))
+            print(
+                f'{bench.__name__:12s} {k:4d} chans   '
+                f'eager {N / eager:8.0f} ops/s   '
+                f'lazy {N / lazy:8.0f} ops/s   '
+                f'x{eager / lazy:.2f}'
+            )
+
+
+if __name__ == '__main__':
+    main()
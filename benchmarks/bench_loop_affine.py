@@ -0,0 +1,72 @@
+''' ping-pong and select throughput, locked chan vs loop-affine chan
+
+    $ python -m benchmarks.bench_loop_affine
+'''
+import time
+from pygoic import Chan, do, go, select
+
+
+N = 50000
+REPEAT = 5
+
+
+async def ping_pong(loop_affine: bool) -> float:
+    ping = Chan[int](loop_affine=loop_affine)
+    pong = Chan[int](loop_affine=loop_affine)
+
+    async def echo():
+        async for x in ping:
+            await pong.send(x)
+
+    go(echo())
+    start = time.perf_counter()
+    for i in range(N):
+        await ping.send(i)
+        await pong.recv()
+    elapsed = time.perf_counter() - start
+    ping.close()
+    return elapsed
+
+
+async def select_ready(loop_affine: bool) -> float:
+    ch1 = Chan[int](N, loop_affine=loop_affine)
+    ch2 = Chan[int](N, loop_affine=loop_affine)
+    for i in range(N // 2):
+        ch1.send_nowait(i)
+        ch2.send_nowait(i)
+
+    start = time.perf_counter()
+    for _ in range(N):
+        await select(ch1, ch2)
+    return time.perf_counter() - start
+
+
+async def select_blocking(loop_affine: bool) -> float:
+    ch1 = Chan[int](loop_affine=loop_affine)
+    ch2 = Chan[int](loop_affine=loop_affine)
+
+    async def produce():
+        for i in range(N):
+            await (ch1 if i % 2 else ch2).send(i)
+
+    go(produce())
+    start = time.perf_counter()
+    for _ in range(N):
+        await select(ch1, ch2)
+    return time.perf_counter() - start
+
+
+def main():
+    for bench in (ping_pong, select_ready, select_blocking):
+        locked = min(do(bench(False)) for _ in range(REPEAT))
+        affine = min(do(bench(True)) for _ in range(REPEAT))
+        print(
+            f'{bench.__name__:16s} '
+            f'locked {N / locked:10.0f} ops/s   '
+            f'affine {N / affine:10.0f} ops/s   '
+            f'x{locked / affine:.2f}'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+''' select on immediately ready chans, fast path vs mutex group path, 
+    and blocking select vs a reused Selector
+
+    $ python -m benchmarks.bench_select
+'''
+import time
+from pygoic import Chan, Selector, do, go, select
+from pygoic.channel import _select_blocking
+
+
+N = 50000
+REPEAT = 5
+
+
+async def ready_recv(fast: bool) -> float:
+    chans = [Chan[int](N) for _ in range(4)]
+    for i in range(N):
+        chans[0].send_nowait(i)
+    ops = tuple(chans)
+
+    start = time.perf_counter()
+    if fast:
+        for _ in range(N):
+            await select(*ops)
+    else:
+        for _ in range(N):
+            await _select_blocking(ops)
+    return time.perf_counter() - start
+
+
+async def ready_send(fast: bool) -> float:
+    chans = [Chan[int](N) for _ in range(4)]
+    out = Chan[int](N)
+
+    start = time.perf_counter()
+    if fast:
+        for i in range(N):
+            await select(*chans[1:], out.case_send(i))
+    else:
+        for i in range(N):
+            await _select_blocking((*chans[1:], out.case_send(i)))
+    return time.perf_counter() - start
+
+
+async def blocking(reuse: bool) -> float:
+    ch1 = Chan[int]()
+    ch2 = Chan[int]()
+    quit = Chan[None]()
+
+    async def produce():
+        for i in range(N):
+            await (ch1 if i % 2 else ch2).send(i)
+
+    go(produce())
+    start = time.perf_counter()
+    if reuse:
+        sel = Selector(quit, ch1, ch2)
+        for _ in range(N):
+            await sel.select()
+    else:
+        for _ in range(N):
+            await select(quit, ch1, ch2)
+    return time.perf_counter() - start
+
+
+def main():
+    for bench in (ready_recv, ready_send):
+        group = min(do(bench(False)) for _ in range(REPEAT))
+        fast = min(do(bench(True)) for _ in range(REPEAT))
+        print(
+            f'{bench.__name__:12s} '
+            f'group {N / group:10.0f} ops/s   '
+            f'fast {N / fast:10.0f} ops/s   '
+            f'x{group / fast:.2f}'
+        )
+
+    plain = min(do(blocking(False)) for _ in range(REPEAT))
+    reused = min(do(blocking(True)) for _ in range(REPEAT))
+    print(
+        f'{"blocking":12s} '
+        f'select {N / plain:9.0f} ops/s   '
+        f'Selector {N / reused:9.0f} ops/s   '
+        f'x{plain / reused:.2f}'
+    )
+
+
+if __name__ == '__main__':
+    main()
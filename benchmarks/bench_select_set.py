@@ -0,0 +1,50 @@
+''' fan-in over many chans, select(*chans) vs SelectSet
+
+    $ python -m benchmarks.bench_select_set
+'''
+import asyncio
+import time
+from pygoic import Chan, SelectSet, do, go, select
+
+
+ROUNDS = 2000
+
+
+async def fan_in(n: int, rounds: int, use_set: bool) -> float:
+    chans = [Chan[int]() for _ in range(n)]
+
+    async def produce():
+        for i in range(rounds):
+            await asyncio.sleep(0)
+            await chans[i * 7919 % n].send(i)
+
+    go(produce())
+    start = time.perf_counter()
+    if use_set:
+        sset = SelectSet()
+        for i, ch in enumerate(chans):
+            sset.add(i, ch)
+        for _ in range(rounds):
+            await sset.select()
+    else:
+        for _ in range(rounds):
+            await select(*chans)
+    return time.perf_counter() - start
+
+
+def main():
+    for n in (10, 100, 1000, 10000):
+        # plain select gets slow quickly, keep its run short
+        rounds = min(ROUNDS, 200000 // n)
+        plain = do(fan_in(n, rounds, False)) / rounds
+        sset = do(fan_in(n, ROUNDS, True)) / ROUNDS
+        print(
+            f'{n:6d} chans   '
+            f'select {1 / plain:9.0f} ops/s   '
+            f'SelectSet {1 / sset:9.0f} ops/s   '
+            f'x{plain / sset:.1f}'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+''' goroutines spawned from a plain thread and run to completion, one go() each
+    vs a single go_many(), plus spawning from inside the loop and over four loops
+
+    $ python -m benchmarks.bench_spawn
+'''
+import time
+from pygoic import do, go, go_many
+from pygoic.executor import GoroutineExecutor
+
+
+N = 100000
+REPEAT = 5
+
+
+async def noop():
+    pass
+
+
+async def drained():
+    # queued behind every goroutine spawned before it
+    pass
+
+
+def from_thread(batch: bool) -> float:
+    start = time.perf_counter()
+    if batch:
+        futures = go_many(noop() for _ in range(N))
+    else:
+        futures = [go(noop()) for _ in range(N)]
+    do(drained())
+    assert futures[-1].done() # type: ignore
+    return time.perf_counter() - start
+
+
+def on_loop(batch: bool) -> float:
+    async def spawn():
+        start = time.perf_counter()
+        if batch:
+            futures = go_many(noop() for _ in range(N))
+        else:
+            futures = [go(noop()) for _ in range(N)]
+        await futures[-1]
+        return time.perf_counter() - start
+
+    return do(spawn())
+
+
+_sharded = GoroutineExecutor(4)
+
+
+async def wait_all(futures):
+    for future in futures:
+        await future
+
+
+def sharded(batch: bool) -> float:
+    ex = _sharded
+    start = time.perf_counter()
+    if batch:
+        futures = ex.go_many(noop() for _ in range(N))
+    else:
+        futures = [ex.go(noop()) for _ in range(N)]
+    ex.do(wait_all(futures))
+    return time.perf_counter() - start
+
+
+def main():
+    for bench in (from_thread, on_loop, sharded):
+        single = min(bench(False) for _ in range(REPEAT))
+        batch = min(bench(True) for _ in range(REPEAT))
+        print(
+            f'{bench.__name__:12s} '
+            f'go {N / single:9.0f} /s   '
+            f'go_many {N / batch:9.0f} /s   '
+            f'x{single / batch:.2f}'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+''' a plain thread feeding a goroutine and draining one, over a buffered chan,
+    one do() per item vs the blocking sync calls vs a single batch
+
+    $ python -m benchmarks.bench_sync
+'''
+import time
+from pygoic import Chan, do, do_many, go
+
+
+N = 20000
+REPEAT = 5
+
+
+async def drain(ch: Chan[int], done: Chan[None]):
+    async for _ in ch:
+        pass
+    await done.send(None)
+
+
+def send(mode: str) -> float:
+    ch = Chan[int](64, loop_affine=False)
+    done = Chan[None](loop_affine=False)
+    go(drain(ch, done))
+    start = time.perf_counter()
+    if mode == 'do':
+        for i in range(N):
+            do(ch.send(i))
+    elif mode == 'sync':
+        for i in range(N):
+            ch.send_sync(i)
+    else:
+        do_many(ch.send(i) for i in range(N))
+    ch.close()
+    done.recv_sync()
+    return time.perf_counter() - start
+
+
+async def fill(ch: Chan[int]):
+    await ch.send_many(range(N))
+    ch.close()
+
+
+def recv(mode: str) -> float:
+    ch = Chan[int](64, loop_affine=False)
+    go(fill(ch))
+    start = time.perf_counter()
+    n = 0
+    if mode == 'do':
+        while do(ch.recv())[1]:
+            n += 1
+    elif mode == 'sync':
+        while ch.recv_sync()[1]:
+            n += 1
+    else:
+        while True:
+            items, ok = ch.recv_many_sync(64)
+            if not ok:
+                break
+            n += len(items)
+    assert n == N
+    return time.perf_counter() - start
+
+
+def main():
+    for bench, batch in ((send, 'do_many'), (recv, 'recv_many_sync')):
+        per_do = min(bench('do') for _ in range(REPEAT))
+        sync = min(bench('sync') for _ in range(REPEAT))
+        batched = min(bench('batch') for _ in range(REPEAT))
+        print(
+            f'{bench.__name__:5s} '
+            f'do {N / per_do:9.0f} /s   '
+            f'sync {N / sync:9.0f} /s   '
+            f'{batch} {N / batched:9.0f} /s   '
+            f'x{per_do / sync:.2f} / x{per_do / batched:.2f}'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,7 @@
 
 
-from .executor import go, do, delegate
-from .channel import Chan, select, ChanClosedError, nilchan
+from .executor import go, go_many, do, do_many, delegate, delegate_process, set_loops, set_eager, set_process_pool
+from .channel import Chan, PriorityChan, Pipe, Broadcast, Subscriber, Signal, select, Selector, SelectSet, ChanClosedError, ChanTimeoutError, nilchan, set_default_loop_affine
 from .context import (
     Context, CancelFunc, Canceled, DeadlineExceeded,
     Background, TODO, WithCancel, WithDeadline, WithTimeout, WithValue,
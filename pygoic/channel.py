@@ -1,11 +1,16 @@
 
 from __future__ import annotations
-from abc import ABC, abstractmethod
 import asyncio
 from collections import deque
-from threading import Lock
-from typing import Any, Generic, List, Optional, Tuple, TypeVar, Deque, Union
+from itertools import chain, count
+import random
+from threading import Lock, get_ident
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Generic, Iterable, List, Literal, NoReturn, Optional, Tuple, TypeVar, Deque, Union, TYPE_CHECKING
 from .linked import LinkedList, LinkedNode
+from .ring import ArrayRingBuffer, NumpyRingBuffer, TypedRingBuffer
+
+if TYPE_CHECKING:
+    from .context import Context
 
 
 T = TypeVar('T')
@@ -17,80 +22,191 @@ class ChanClosedError(Exception):
     pass
 
 
-# abstract of chan item reader / writer
+class ChanTimeoutError(Exception):
+    pass
+
+
+# abstract of chan item reader / writer, plain classes rather than ABCs to keep
+# construction cheap, as one is created for every blocked operation
+
+class _ChanItemReader(Generic[T]):
+    __slots__ = ()
 
-class _ChanItemReader(ABC, Generic[T]):
-    @abstractmethod
     def put(self, item: T, ok: bool):
-        pass
+        raise NotImplementedError
     
-    @abstractmethod
     def close(self):
-        pass
+        raise NotImplementedError
 
-    @abstractmethod
     def getlock(self) -> Optional[Lock]:
-        pass
+        raise NotImplementedError
     
-    @abstractmethod
     def discarded(self) -> bool:
-        pass
+        raise NotImplementedError
     
 
-class _ChanItemWriter(ABC, Generic[T]):
-    @abstractmethod
+class _ChanItemWriter(Generic[T]):
+    __slots__ = ()
+
     def take(self) -> T:
-        pass
+        raise NotImplementedError
     
-    @abstractmethod
     def close(self):
-        pass
+        raise NotImplementedError
 
-    @abstractmethod
     def getlock(self) -> Optional[Lock]:
-        pass
+        raise NotImplementedError
     
-    @abstractmethod
     def discarded(self) -> bool:
-        pass
+        raise NotImplementedError
     
 
+# wake a future owned by some loop, from any thread
+
+def _set_result_unless_done(future: asyncio.Future, result: Any):
+    if not future.done():
+        future.set_result(result)
+
+
+def _set_exception_unless_done(future: asyncio.Future, ex: BaseException):
+    if not future.done():
+        future.set_exception(ex)
+
+
+def _wake_result(loop: asyncio.AbstractEventLoop, future: asyncio.Future, result: Any):
+    if asyncio._get_running_loop() is loop:
+        future.set_result(result)
+    else:
+        loop.call_soon_threadsafe(_set_result_unless_done, future, result)
+
+
+def _wake_exception(loop: asyncio.AbstractEventLoop, future: asyncio.Future, ex: BaseException):
+    if asyncio._get_running_loop() is loop:
+        future.set_exception(ex)
+    else:
+        loop.call_soon_threadsafe(_set_exception_unless_done, future, ex)
+
+
+def _run_soon(loop: asyncio.AbstractEventLoop, func: Callable[..., Any], *args: Any):
+    if asyncio._get_running_loop() is loop:
+        loop.call_soon(func, *args)
+    else:
+        loop.call_soon_threadsafe(func, *args)
+
+
 # simple chan item reader / writer
 
 class _SimpleChanItemReader(_ChanItemReader[T]):
-    def __init__(self):
-        self._future: asyncio.Future[Tuple[Optional[T], bool]] = asyncio.Future()
+    __slots__ = ('_chan', '_node', '_loop', '_future')
+
+    def __init__(self, chan: Chan[T]):
+        self._chan = chan
+        self._node: Optional[LinkedNode] = None
+        self._loop = asyncio.get_running_loop()
+        self._future: asyncio.Future[Tuple[Optional[T], bool]] = self._loop.create_future()
 
     async def read(self) -> Tuple[Optional[T], bool]:
-        return await self._future
+        try:
+            return await self._future
+        except asyncio.CancelledError:
+            self._chan._call_locked(self._chan._abandon_reader_inner, self)
+            raise
         
     def put(self, item: T, ok: bool):
-        self._future.set_result((item, ok))
+        if asyncio._get_running_loop() is self._loop:
+            self._future.set_result((item, ok))
+        else:
+            self._loop.call_soon_threadsafe(self._deliver, item, ok)
+
+    def _deliver(self, item: T, ok: bool):
+        if self._future.cancelled():
+            # gave up before the item arrived, pass it on
+            if ok:
+                self._chan._call_locked(self._give_back_inner, item)
+        else:
+            self._future.set_result((item, ok))
+
+    def _give_back_inner(self, item: T):
+        self._chan._requeue_inner(item)
 
     def close(self):
-        self._future.set_result((None, False))
+        self.put(None, False) # type: ignore
 
     def getlock(self) -> Optional[Lock]:
         return None
     
     def discarded(self) -> bool:
-        return False
+        return self._future.done()
 
 
 class _SimpleChanItemWriter(_ChanItemWriter[T]):
-    def __init__(self, item: T):
+    __slots__ = ('_chan', '_item', '_node', '_loop', '_future')
+
+    def __init__(self, chan: Chan[T], item: T):
+        self._chan = chan
         self._item = item
-        self._future: asyncio.Future[None] = asyncio.Future()
+        self._node: Optional[LinkedNode] = None
+        self._loop = asyncio.get_running_loop()
+        self._future: asyncio.Future[None] = self._loop.create_future()
 
     async def write(self):
-        await self._future
+        try:
+            await self._future
+        except asyncio.CancelledError:
+            # not sent unless already taken
+            if self._node is not None:
+                self._chan._release_node(self._node)
+            raise
+    
+    def take(self) -> T:
+        _wake_result(self._loop, self._future, None)
+        return self._item
+
+    def close(self):
+        _wake_exception(self._loop, self._future, ChanClosedError('chan closed'))
+
+    def getlock(self) -> Optional[Lock]:
+        return None
     
+    def discarded(self) -> bool:
+        return self._future.done()
+
+
+class _RequeuedChanItemWriter(_ChanItemWriter[T]):
+    ''' carries an item given back by a cancelled receiver, nobody waits on it
+    '''
+    __slots__ = ('_item',)
+
+    def __init__(self, item: T):
+        self._item = item
+
     def take(self) -> T:
-        self._future.set_result(None)
         return self._item
 
     def close(self):
-        self._future.set_exception(ChanClosedError('chan closed'))
+        pass
+
+    def getlock(self) -> Optional[Lock]:
+        return None
+    
+    def discarded(self) -> bool:
+        return False
+
+
+# callback reader, lets a waiter watch another chan being closed
+
+class _CallbackChanItemReader(_ChanItemReader[Any]):
+    __slots__ = ('_loop', '_func')
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, func: Callable[[], Any]):
+        self._loop = loop
+        self._func = func
+
+    def put(self, item: Any, ok: bool):
+        _run_soon(self._loop, self._func)
+
+    def close(self):
+        _run_soon(self._loop, self._func)
 
     def getlock(self) -> Optional[Lock]:
         return None
@@ -99,9 +215,126 @@ class _SimpleChanItemWriter(_ChanItemWriter[T]):
         return False
 
 
+# thread chan item reader / writer, blocking a plain thread rather than a loop
+
+def _check_sync(name: str):
+    if asyncio._get_running_loop() is not None:
+        raise RuntimeError(f'Not allow to call `{name}` inside a event loop.')
+
+
+class _ThreadChanItemReader(_ChanItemReader[T]):
+    __slots__ = ('_node', '_wakeup', '_item', '_ok')
+
+    def __init__(self):
+        self._node: Optional[LinkedNode] = None
+        # held until an item arrives, the waiting thread blocks acquiring it
+        self._wakeup = Lock()
+        self._wakeup.acquire()
+        self._item: Optional[T] = None
+        self._ok = False
+
+    def put(self, item: T, ok: bool):
+        self._item = item
+        self._ok = ok
+        self._wakeup.release()
+
+    def close(self):
+        self.put(None, False) # type: ignore
+
+    def getlock(self) -> Optional[Lock]:
+        return None
+
+    def discarded(self) -> bool:
+        # one giving up unlinks itself under the chan lock
+        return False
+
+
+class _ThreadChanItemWriter(_ChanItemWriter[T]):
+    __slots__ = ('_item', '_node', '_wakeup', '_closed')
+
+    def __init__(self, item: T):
+        self._item = item
+        self._node: Optional[LinkedNode] = None
+        self._wakeup = Lock()
+        self._wakeup.acquire()
+        self._closed = False
+
+    def take(self) -> T:
+        self._wakeup.release()
+        return self._item
+
+    def close(self):
+        self._closed = True
+        self._wakeup.release()
+
+    def getlock(self) -> Optional[Lock]:
+        return None
+
+    def discarded(self) -> bool:
+        return False
+
+
+# batch chan item writer
+
+class _BatchWriteState:
+    __slots__ = ('chan', 'remaining', 'closed', 'nodes', 'loop', 'future')
+
+    def __init__(self, chan: Chan[Any], count: int):
+        self.chan = chan
+        self.remaining = count
+        self.closed = False
+        self.nodes: List[LinkedNode] = []
+        self.loop = asyncio.get_running_loop()
+        self.future: asyncio.Future[None] = self.loop.create_future()
+
+    async def wait(self):
+        try:
+            await self.future
+        except asyncio.CancelledError:
+            # items not taken yet are not sent
+            self.chan._call_locked(self._unlink)
+            raise
+
+    def _unlink(self):
+        for node in self.nodes:
+            node.delete()
+        if self.chan._weighted:
+            self.chan._admit_inner()
+
+
+class _BatchChanItemWriter(_ChanItemWriter[T]):
+    __slots__ = ('_item', '_state')
+
+    def __init__(self, item: T, state: _BatchWriteState):
+        self._item = item
+        self._state = state
+
+    def take(self) -> T:
+        state = self._state
+        state.remaining -= 1
+        if state.remaining == 0:
+            _wake_result(state.loop, state.future, None)
+        return self._item
+
+    def close(self):
+        # one batch shares a single future, only the first close counts
+        state = self._state
+        if not state.closed:
+            state.closed = True
+            _wake_exception(state.loop, state.future, ChanClosedError('chan closed'))
+
+    def getlock(self) -> Optional[Lock]:
+        return None
+    
+    def discarded(self) -> bool:
+        return self._state.future.cancelled()
+
+
 # mutex reader / writer group
 
 class _GeminiLock:
+    __slots__ = ('_lock_1', '_lock_2')
+
     def __init__(self, lock_1: Lock, lock_2: Lock):
         assert lock_1 is not lock_2
         if id(lock_1) < id(lock_2):
@@ -121,23 +354,72 @@ class _GeminiLock:
         self._lock_1.release()
 
 
+def _deliver_select(future: asyncio.Future, chan: Optional[Chan], level: Optional[int], result: Tuple[int, Any, bool]):
+    if future.done():
+        # cancelled meanwhile
+        _give_back_select(chan, level, result)
+    else:
+        future.set_result(result)
+
+
+def _give_back_select(chan: Optional[Chan], level: Optional[int], result: Tuple[int, Any, bool]):
+    _, item, ok = result
+    if not ok or chan is None:
+        return
+    if level is None:
+        chan._call_locked(chan._requeue_inner, item)
+    else:
+        # a priority chan's item goes back to its own level
+        chan._call_locked(chan._requeue_inner, item, level)
+
+
 class _MutexGroup:
+    __slots__ = ('_lock', '_loop', '_future', '_nodes', '_completed', '_result_chan', '_result_level')
+
     def __init__(self):
         self._lock = Lock()
-        self._future: asyncio.Future[Tuple[int, Any, bool]] = asyncio.Future()
+        self._loop = asyncio.get_running_loop()
+        self._future: asyncio.Future[Tuple[int, Any, bool]] = self._loop.create_future()
         self._nodes: List[Tuple[LinkedNode, Chan]] = []
+        # the future may complete later on its own loop, so track it here
+        self._completed = False
+        # a received item goes back to this chan if the select is cancelled
+        self._result_chan: Optional[Chan] = None
+        self._result_level: Optional[int] = None
 
     def getlock(self) -> Lock:
         return self._lock
     
     def done(self) -> bool:
-        return self._future.done()
+        return self._completed or self._future.done()
     
-    def set_result(self, id: int, item: Any, ok: bool):
-        self._future.set_result((id, item, ok))
+    def set_result(self, id: int, item: Any, ok: bool, chan: Optional[Chan] = None, level: Optional[int] = None):
+        self._completed = True
+        self._result_chan = chan
+        self._result_level = level
+        if asyncio._get_running_loop() is self._loop:
+            self._future.set_result((id, item, ok))
+        else:
+            # bound to this round, a reused group may be on the next one by then
+            self._loop.call_soon_threadsafe(_deliver_select, self._future, chan, level, (id, item, ok))
+
+    def abandon(self):
+        # the select is cancelled, don't lose an item it already received
+        future = self._future
+        if future.done() and not future.cancelled() and future.exception() is None:
+            _give_back_select(self._result_chan, self._result_level, future.result())
     
     def set_exception(self, ex: Exception):
-        self._future.set_exception(ex)
+        self._completed = True
+        _wake_exception(self._loop, self._future, ex)
+
+    def reset(self):
+        # ready for another round, only the future can't be reused
+        self._future = self._loop.create_future()
+        self._completed = False
+        self._result_chan = None
+        self._result_level = None
+        self._nodes.clear()
 
     def add_node(self, node: LinkedNode, chan: Chan):
         self._nodes.append((node, chan))
@@ -145,17 +427,19 @@ class _MutexGroup:
     def release(self):
         for node, chan in self._nodes:
             if node.list is not None:
-                with chan._lock:
-                    node.delete()
+                chan._release_stale(node)
 
 
 class _MutexChanItemReader(_ChanItemReader[T]):
-    def __init__(self, id: int, group: _MutexGroup):
+    __slots__ = ('_id', '_group', '_chan')
+
+    def __init__(self, id: int, group: _MutexGroup, chan: Chan[T]):
         self._id = id
         self._group = group
+        self._chan = chan
 
     def put(self, item: T, ok: bool):
-        self._group.set_result(self._id, item, ok)
+        self._group.set_result(self._id, item, ok, self._chan)
     
     def close(self):
         self._group.set_result(self._id, None, False)
@@ -168,6 +452,8 @@ class _MutexChanItemReader(_ChanItemReader[T]):
 
 
 class _MutexChanItemWriter(_ChanItemWriter[T]):
+    __slots__ = ('_item', '_id', '_group')
+
     def __init__(self, id: int, item: T, group: _MutexGroup):
         self._item = item
         self._id = id
@@ -190,86 +476,391 @@ class _MutexChanItemWriter(_ChanItemWriter[T]):
 # case send / recv
 
 class _CaseSend(Generic[T]):
+    __slots__ = ('chan', 'item')
+
     def __init__(self, chan: Chan[T], item: T):
         self.chan = chan
         self.item = item
 
 
 class _CaseRecv(Generic[T]):
+    __slots__ = ('chan',)
+
     def __init__(self, chan: Chan[T]):
         self.chan = chan
+
+
+class _SelectCase:
+    ''' a select case over something other than a chan
+    '''
+    __slots__ = ()
+
+    def _select_try(self) -> Tuple[bool, Any, bool]:
+        ''' return (success, item, ok) if ready now, may raise ChanClosedError
+        '''
+        raise NotImplementedError
+
+    def _select_register(self, group: _MutexGroup, id: int):
+        ''' complete the group if ready, or queue a waiter and add its node to the group
+        '''
+        raise NotImplementedError
         
 
 # Chan
 
 _empty_deque = deque(maxlen=0)
 
+# waiters queued on a chan before sweeping out discarded ones
+_SWEEP_MIN = 64
+
+_default_loop_affine = False
+
+
+def set_default_loop_affine(enabled: bool):
+    ''' make chans created afterwards loop-affine unless told otherwise
+    '''
+    global _default_loop_affine
+    _default_loop_affine = enabled
+
+
+class _WeightedBuffer(Generic[T]):
+    ''' a FIFO of items bounded by their total weight, and optionally their count
+    '''
+    __slots__ = ('_items', '_weight', '_max_weight', '_sizeof', '_max_len')
+
+    def __init__(self, max_weight: int, sizeof: Callable[[T], int], max_len: int):
+        self._items: Deque[Tuple[T, int]] = deque()
+        self._weight = 0
+        self._max_weight = max_weight
+        self._sizeof = sizeof
+        self._max_len = max_len
+
+
+    def try_append(self, item: T) -> bool:
+        weight = self._sizeof(item)
+        if self._items:
+            if self._max_len > 0 and len(self._items) >= self._max_len:
+                return False
+            if self._weight + weight > self._max_weight:
+                return False
+        # else an item heavier than the limit still goes into an empty buffer
+        self._items.append((item, weight))
+        self._weight += weight
+        return True
+
+
+    def appendleft(self, item: T):
+        weight = self._sizeof(item)
+        self._items.appendleft((item, weight))
+        self._weight += weight
+
+
+    def popleft(self) -> T:
+        item, weight = self._items.popleft()
+        self._weight -= weight
+        return item
+
+
+    def weight(self) -> int:
+        return self._weight
+
+
+    def __len__(self):
+        return len(self._items)
+
+
+    def __bool__(self):
+        return bool(self._items)
+
+
+
+# what a full chan does with another item
+Overflow = Literal['block', 'drop_newest', 'drop_oldest']
+
+
 class Chan(Generic[T]):
-    def __init__(self, buffsize: int = 0):
+    def __init__(
+        self,
+        buffsize: int = 0,
+        loop_affine: Optional[bool] = None,
+        typecode: Optional[str] = None,
+        dtype: Any = None,
+        max_bytes: Optional[int] = None,
+        sizeof: Optional[Callable[[T], int]] = None,
+        overflow: Overflow = 'block',
+        handoff: bool = False,
+    ):
+        if overflow not in ('block', 'drop_newest', 'drop_oldest'):
+            raise ValueError(f'unknown chan overflow {overflow!r}')
+        if overflow != 'block' and buffsize <= 0 and max_bytes is None:
+            raise ValueError('a dropping chan must be buffered')
+        if handoff and (buffsize > 0 or max_bytes is not None):
+            raise ValueError('a handoff chan must be unbuffered')
+        self._overflow = overflow
+        self._dropped = 0
+        # yield after handing an item straight to a reader, so that it runs next
+        self._handoff = handoff
         self._buffsize = buffsize
-        self._buff: Deque[T] = deque() if self._buffsize > 0 else _empty_deque
+        self._buff: Union[Deque[T], TypedRingBuffer[T], _WeightedBuffer[T]]
+        self._weighted = max_bytes is not None
+        # a typed chan converts items as it sends them, so a bad one fails its sender
+        self._coerce: Optional[Callable[[Any], T]] = None
+        if self._weighted:
+            # bounded by weight, buffsize if given also bounds the count
+            if sizeof is None:
+                raise ValueError('a chan with max_bytes needs sizeof')
+            if max_bytes <= 0: # type: ignore
+                raise ValueError('max_bytes must be positive')
+            if typecode is not None or dtype is not None:
+                raise ValueError('a typed chan can\'t be weighted')
+            self._buff = _WeightedBuffer(max_bytes, sizeof, buffsize) # type: ignore
+            # so that the plain count check never passes
+            self._buffsize = 0
+        elif sizeof is not None:
+            raise ValueError('sizeof needs max_bytes')
+        elif typecode is not None or dtype is not None:
+            # a typed chan keeps its buffer unboxed, in a preallocated ring
+            if typecode is not None and dtype is not None:
+                raise ValueError('typecode and dtype are mutually exclusive')
+            if buffsize <= 0:
+                raise ValueError('a typed chan must be buffered')
+            if typecode is not None:
+                self._buff = ArrayRingBuffer(typecode, buffsize)
+            else:
+                self._buff = NumpyRingBuffer(dtype, buffsize)
+            self._coerce = self._buff.coerce
+        else:
+            self._buff = deque() if self._buffsize > 0 else _empty_deque
         self._readers: LinkedList[_ChanItemReader[T]] = LinkedList()
         self._writers: LinkedList[_ChanItemWriter[T]] = LinkedList()
         self._closed = False
+        # items given back to an unbuffered chan after it was closed, still to be received
+        self._returned: Optional[Deque[T]] = None
         self._lock = Lock()
+        # a loop-affine chan skips its lock, and is bound to the first thread using it
+        self._affine = _default_loop_affine if loop_affine is None else loop_affine
+        self._owner: Optional[int] = None
+        # Waiters of a select done elsewhere are unlinked only if our lock is free,
+        # otherwise left queued, skipped as discarded and swept once the queues double.
+        # A weighted chan always unlinks them, a stale writer would hold back admission.
+        self._lazy_release = not self._weighted
+        self._sweep_at = _SWEEP_MIN
 
 
     def close(self):
+        if self._affine:
+            self._check_affinity()
+            self._close_inner()
+            return
         with self._lock:
-            self._closed = True
-            # close all readers
-            while self._readers:
-                reader = self._readers.popleft()
-                lock = reader.getlock()
-                if lock:
-                    lock.acquire()
-                try:
-                    # close reader
-                    if not reader.discarded():
-                        reader.close()
-                finally:
-                    if lock:
-                        lock.release()
-            # close all writers
-            while self._writers:
-                writer = self._writers.popleft()
-                lock = writer.getlock()
-                if lock:
-                    lock.acquire()
-                try:
-                    # close writer
-                    if not writer.discarded():
-                        writer.close()
-                finally:
-                    if lock:
-                        lock.release()
+            self._close_inner()
 
 
-    async def send(self, item: T):
-        with self._lock:
-            sent = self._send_inner(item)
-            if sent:
-                return
+    def __len__(self):
+        ''' the number of buffered items
+        '''
+        return len(self._buff)
 
-            writer = _SimpleChanItemWriter(item)
-            self._writers.append(writer)
-            
-        await writer.write()
 
+    def __bool__(self):
+        # a chan is truthy even when empty
+        return True
 
-    async def recv(self) -> Tuple[Optional[T], bool]:
-        with self._lock:
+
+    def weight(self) -> int:
+        ''' the total weight of buffered items, their number if the chan isn't weighted
+        '''
+        if self._weighted:
+            return self._buff.weight() # type: ignore
+        return len(self._buff)
+
+
+    def dropped(self) -> int:
+        ''' the number of items discarded by the overflow policy so far
+        '''
+        return self._dropped
+
+
+    async def send(self, item: T, timeout: Optional[float] = None, ctx: Optional[Context] = None):
+        if ctx is not None and ctx.err() is not None:
+            raise ctx.err() # type: ignore
+        if self._coerce is not None:
+            item = self._coerce(item)
+        if self._affine:
+            self._check_affinity()
+            writer = self._send_or_wait(item)
+        else:
+            with self._lock:
+                writer = self._send_or_wait(item)
+        if writer is None:
+            if self._handoff:
+                await asyncio.sleep(0)
+            return
+        if timeout is None and ctx is None:
+            await writer.write()
+        else:
+            await self._wait_bounded(writer, writer.write(), timeout, ctx)
+
+
+    async def recv(self, timeout: Optional[float] = None, ctx: Optional[Context] = None) -> Tuple[Optional[T], bool]:
+        if ctx is not None and ctx.err() is not None:
+            raise ctx.err() # type: ignore
+        if self._affine:
+            self._check_affinity()
             received, item, ok = self._recv_inner()
             if received:
                 return item, ok
+            reader = self._recv_wait()
+        else:
+            with self._lock:
+                received, item, ok = self._recv_inner()
+                if received:
+                    return item, ok
+                reader = self._recv_wait()
+
+        if timeout is None and ctx is None:
+            return await reader.read()
+        return await self._wait_bounded(reader, reader.read(), timeout, ctx)
+
+
+    async def send_many(self, items: Iterable[T]):
+        if self._coerce is not None:
+            items = [self._coerce(item) for item in items]
+        if self._affine:
+            self._check_affinity()
+            state = self._send_many_or_wait(items)
+        else:
+            with self._lock:
+                state = self._send_many_or_wait(items)
+        if state is not None:
+            await state.wait()
 
-            reader = _SimpleChanItemReader[T]()
-            self._readers.append(reader)
-            
-        return await reader.read()
+
+    async def recv_many(self, max_n: int) -> Tuple[List[T], bool]:
+        if max_n <= 0:
+            raise ValueError('max_n must be positive')
+
+        if self._affine:
+            self._check_affinity()
+            items, ok, reader = self._recv_many_or_wait(max_n)
+        else:
+            with self._lock:
+                items, ok, reader = self._recv_many_or_wait(max_n)
+        if reader is None:
+            return items, ok
+
+        item, ok = await reader.read()
+        if not ok:
+            return [], False
+        items = [item] # type: ignore
+        if max_n > 1:
+            # collect whatever else became ready meanwhile
+            more, _ = self.recv_many_nowait(max_n - 1)
+            items.extend(more)
+        return items, True
+
+
+    async def recv_many_into(self, out: Any) -> Tuple[int, bool]:
+        ''' receive up to len(out) items straight into out, a writable one-dimensional
+            buffer matching a typed chan's item format; return (n, ok)
+        '''
+        view = self._into_view(out)
+        if self._affine:
+            self._check_affinity()
+            n, ok, reader = self._recv_many_into_or_wait(view)
+        else:
+            with self._lock:
+                n, ok, reader = self._recv_many_into_or_wait(view)
+        if reader is None:
+            return n, ok
+
+        item, ok = await reader.read()
+        if not ok:
+            return 0, False
+        view[0] = item
+        n = 1
+        if len(view) > 1:
+            more, _ = self.recv_many_into_nowait(view[1:])
+            n += more
+        return n, True
+
+
+    async def batches(self, max_items: int, max_wait: float) -> AsyncIterator[List[T]]:
+        ''' yield lists of up to max_items, waiting at most max_wait after the first
+            item of a batch, until the chan is closed and drained
+        '''
+        if max_items <= 0:
+            raise ValueError('max_items must be positive')
+        if max_wait < 0:
+            raise ValueError('max_wait must not be negative')
+
+        while True:
+            batch, ok = await self.recv_many(max_items)
+            if not ok:
+                return
+            if len(batch) < max_items:
+                try:
+                    ok = await self._fill_batch(batch, max_items, max_wait)
+                except asyncio.CancelledError:
+                    # nobody gets the partial batch, so it goes back to the front in order
+                    self._call_locked(self._requeue_batch_inner, batch)
+                    raise
+            yield batch
+            if not ok:
+                return
+
+
+    def _requeue_batch_inner(self, batch: List[T]):
+        for item in reversed(batch):
+            self._requeue_inner(item)
+
+
+    async def _fill_batch(self, batch: List[T], max_items: int, max_wait: float) -> bool:
+        ''' return False if the chan turned out closed and drained
+        '''
+        loop = asyncio.get_running_loop()
+        # one timer for the whole batch, expiring whichever reader is waiting
+        waiting: List[Optional[_SimpleChanItemReader[T]]] = [None]
+        expired = [False]
+
+        def expire():
+            expired[0] = True
+            if waiting[0] is not None:
+                self._expire(waiting[0], None)
+
+        handle = loop.call_later(max_wait, expire)
+        try:
+            while len(batch) < max_items and not expired[0]:
+                if self._affine:
+                    self._check_affinity()
+                    items, ok, reader = self._recv_many_or_wait(max_items - len(batch))
+                else:
+                    with self._lock:
+                        items, ok, reader = self._recv_many_or_wait(max_items - len(batch))
+                if reader is None:
+                    if not ok:
+                        return False
+                    batch.extend(items)
+                    continue
+
+                waiting[0] = reader
+                try:
+                    item, ok = await reader.read()
+                except ChanTimeoutError:
+                    break
+                finally:
+                    waiting[0] = None
+                if not ok:
+                    return False
+                batch.append(item) # type: ignore
+            return True
+        finally:
+            handle.cancel()
 
 
     def case_send(self, item: T) -> _CaseSend[T]:
+        if self._coerce is not None:
+            item = self._coerce(item)
         return _CaseSend(self, item)
 
 
@@ -278,61 +869,512 @@ class Chan(Generic[T]):
 
 
     def send_nowait(self, item: T) -> bool:
+        if self._coerce is not None:
+            item = self._coerce(item)
+        if self._affine:
+            self._check_affinity()
+            return self._send_inner(item)
         with self._lock:
             return self._send_inner(item)
 
 
     def recv_nowait(self) -> Tuple[bool, Optional[T], bool]:
+        if self._affine:
+            self._check_affinity()
+            return self._recv_inner()
         with self._lock:
             return self._recv_inner()
 
 
-    def _send_inner(self, item: T) -> bool:
-        ''' return sent: bool
+    def send_many_nowait(self, items: Iterable[T]) -> int:
+        ''' return the number of leading items sent
         '''
-        if self._closed:
-            raise ChanClosedError('chan closed')
+        if self._coerce is not None:
+            items = [self._coerce(item) for item in items]
+        if self._affine:
+            self._check_affinity()
+            return self._send_many_inner(items)
+        with self._lock:
+            return self._send_many_inner(items)
 
-        while self._readers:
-            reader = self._readers.popleft()
-            lock = reader.getlock()
-            if lock:
-                lock.acquire()
-            try:
-                if not reader.discarded():
-                    # send
-                    reader.put(item, True)
-                    return True
+
+    def recv_many_nowait(self, max_n: int) -> Tuple[List[T], bool]:
+        if max_n <= 0:
+            raise ValueError('max_n must be positive')
+
+        if self._affine:
+            self._check_affinity()
+            return self._recv_many_inner(max_n)
+        with self._lock:
+            return self._recv_many_inner(max_n)
+
+
+    def send_sync(self, item: T, timeout: Optional[float] = None):
+        ''' send from a plain thread, blocking it until sent
+        '''
+        _check_sync('send_sync')
+        if self._coerce is not None:
+            item = self._coerce(item)
+        writer = self._call_locked(self._send_or_wait_sync, item)
+        if writer is not None:
+            self._wait_sync(writer, timeout)
+
+
+    def recv_sync(self, timeout: Optional[float] = None) -> Tuple[Optional[T], bool]:
+        ''' receive from a plain thread, blocking it until an item or close arrives
+        '''
+        _check_sync('recv_sync')
+        items, ok, reader = self._call_locked(self._recv_many_or_wait_sync, 1)
+        if reader is None:
+            return (items[0], True) if items else (None, ok)
+        self._wait_sync(reader, timeout)
+        return reader._item, reader._ok
+
+
+    def recv_many_sync(self, max_n: int, timeout: Optional[float] = None) -> Tuple[List[T], bool]:
+        ''' like recv_many, from a plain thread, taking whatever is ready in one go
+        '''
+        if max_n <= 0:
+            raise ValueError('max_n must be positive')
+        _check_sync('recv_many_sync')
+        items, ok, reader = self._call_locked(self._recv_many_or_wait_sync, max_n)
+        if reader is None:
+            return items, ok
+        self._wait_sync(reader, timeout)
+        if not reader._ok:
+            return [], False
+        items = [reader._item] # type: ignore
+        if max_n > 1:
+            more, _ = self.recv_many_nowait(max_n - 1)
+            items.extend(more)
+        return items, True
+
+
+    def recv_many_into_nowait(self, out: Any) -> Tuple[int, bool]:
+        view = self._into_view(out)
+        if self._affine:
+            self._check_affinity()
+            return self._recv_many_into_inner(view)
+        with self._lock:
+            return self._recv_many_into_inner(view)
+
+
+    def _into_view(self, out: Any) -> memoryview:
+        if not isinstance(self._buff, TypedRingBuffer):
+            raise TypeError('recv_many_into requires a chan with typecode or dtype')
+        view = memoryview(out)
+        if view.readonly or view.ndim != 1:
+            raise ValueError('out must be a writable one-dimensional buffer')
+        if not self._buff.fits(view):
+            raise TypeError(f'out has format {view.format!r}, chan has {self._buff.format()!r}')
+        if len(view) == 0:
+            raise ValueError('out must not be empty')
+        return view
+
+
+    def _check_affinity(self):
+        ident = get_ident()
+        if self._owner == ident:
+            return
+        if self._owner is None:
+            self._owner = ident
+        else:
+            raise RuntimeError(
+                f'loop-affine chan is bound to thread {self._owner}, '
+                f'but used from thread {ident}'
+            )
+
+
+    def _close_inner(self):
+        self._closed = True
+        # close all readers
+        while self._readers:
+            reader = self._readers.popleft()
+            lock = reader.getlock()
+            if lock:
+                lock.acquire()
+            try:
+                # close reader
+                if not reader.discarded():
+                    reader.close()
+            finally:
+                if lock:
+                    lock.release()
+        # close all writers, keeping the items given back
+        while self._writers:
+            writer = self._writers.popleft()
+            if isinstance(writer, _RequeuedChanItemWriter):
+                self._return_inner(writer._item, False)
+                continue
+            lock = writer.getlock()
+            if lock:
+                lock.acquire()
+            try:
+                # close writer
+                if not writer.discarded():
+                    writer.close()
             finally:
                 if lock:
                     lock.release()
 
+
+    def _send_or_wait(self, item: T) -> Optional[_SimpleChanItemWriter[T]]:
+        ''' return a queued writer to wait on, or None if sent
+        '''
+        if self._send_inner(item):
+            return None
+        writer = _SimpleChanItemWriter(self, item)
+        writer._node = self._writers.append(writer)
+        return writer
+
+
+    def _send_or_wait_sync(self, item: T) -> Optional[_ThreadChanItemWriter[T]]:
+        if self._send_inner(item):
+            return None
+        writer = _ThreadChanItemWriter(item)
+        writer._node = self._writers.append(writer)
+        return writer
+
+
+    def _recv_many_or_wait_sync(self, max_n: int) -> Tuple[List[T], bool, Optional[_ThreadChanItemReader[T]]]:
+        items, ok = self._recv_many_inner(max_n)
+        if items or not ok:
+            return items, ok, None
+        reader: _ThreadChanItemReader[T] = _ThreadChanItemReader()
+        reader._node = self._readers.append(reader)
+        return items, ok, reader
+
+
+    def _wait_sync(self, waiter: Union[_ThreadChanItemReader[T], _ThreadChanItemWriter[T]], timeout: Optional[float]):
+        if not waiter._wakeup.acquire(timeout=-1 if timeout is None else timeout):
+            if self._call_locked(self._unlink_sync_inner, waiter):
+                raise ChanTimeoutError('chan timeout')
+            # matched just in time, and woken under the chan lock already
+            waiter._wakeup.acquire()
+        if isinstance(waiter, _ThreadChanItemWriter) and waiter._closed:
+            raise ChanClosedError('chan closed')
+
+
+    def _unlink_sync_inner(self, waiter: Union[_ThreadChanItemReader[T], _ThreadChanItemWriter[T]]) -> bool:
+        node = waiter._node
+        if node is None or node.list is None:
+            return False
+        node.delete()
+        if self._weighted:
+            self._admit_inner()
+        return True
+
+
+    def _recv_wait(self) -> _SimpleChanItemReader[T]:
+        reader = _SimpleChanItemReader(self)
+        reader._node = self._readers.append(reader)
+        return reader
+
+
+    def _recv_many_or_wait(self, max_n: int) -> Tuple[List[T], bool, Optional[_SimpleChanItemReader[T]]]:
+        ''' return (items, ok, reader), with a queued reader to wait on if nothing received
+        '''
+        items, ok = self._recv_many_inner(max_n)
+        if items or not ok:
+            return items, ok, None
+        return items, ok, self._recv_wait()
+
+
+    def _recv_many_into_or_wait(self, view: memoryview) -> Tuple[int, bool, Optional[_SimpleChanItemReader[T]]]:
+        n, ok = self._recv_many_into_inner(view)
+        if n or not ok:
+            return n, ok, None
+        return n, ok, self._recv_wait()
+
+
+    def _send_many_inner(self, items: Iterable[T]) -> int:
+        sent = 0
+        for item in items:
+            if not self._send_inner(item):
+                break
+            sent += 1
+        return sent
+
+
+    def _send_many_or_wait(self, items: Iterable[T]) -> Optional[_BatchWriteState]:
+        ''' return a batch state to wait on, or None if all sent
+        '''
+        it = iter(items)
+        for item in it:
+            if not self._send_inner(item):
+                break
+        else:
+            return None
+
+        # queue the rest in order, all sharing one future
+        rest = [item]
+        rest.extend(it)
+        state = _BatchWriteState(self, len(rest))
+        for item in rest:
+            state.nodes.append(self._writers.append(_BatchChanItemWriter(item, state)))
+        return state
+
+
+    def _recv_or_register(self, reader: _ChanItemReader[T]) -> Tuple[bool, Optional[T], bool, Optional[LinkedNode]]:
+        ''' return (received, item, ok, node), reader is queued as node if nothing received
+        '''
+        if self._affine:
+            self._check_affinity()
+            return self._recv_or_register_inner(reader)
+        with self._lock:
+            return self._recv_or_register_inner(reader)
+
+
+    def _recv_or_register_inner(self, reader: _ChanItemReader[T]) -> Tuple[bool, Optional[T], bool, Optional[LinkedNode]]:
+        received, item, ok = self._recv_inner()
+        if received:
+            return True, item, ok, None
+        return False, None, False, self._readers.append(reader)
+
+
+    def _release_node(self, node: LinkedNode):
+        if self._affine:
+            self._check_affinity()
+            node.delete()
+            if self._weighted:
+                self._admit_inner()
+            return
+        with self._lock:
+            node.delete()
+            if self._weighted:
+                self._admit_inner()
+
+
+    def _release_stale(self, node: LinkedNode):
+        ''' unlink the node of a select that completed or gave up
+        '''
+        if self._affine or not self._lazy_release:
+            self._release_node(node)
+        elif self._lock.acquire(False):
+            try:
+                node.delete()
+            finally:
+                self._lock.release()
+
+
+    def _sweep_inner(self):
+        for waiters in (self._readers, self._writers):
+            for node in waiters.iternodes():
+                if node.val.discarded():
+                    node.delete()
+        self._sweep_at = max(2 * (len(self._readers) + len(self._writers)), _SWEEP_MIN)
+
+
+    def _call_locked(self, func: Callable[..., Any], *args: Any) -> Any:
+        if self._affine:
+            self._check_affinity()
+            return func(*args)
+        with self._lock:
+            return func(*args)
+
+
+    async def _wait_bounded(
+        self, 
+        waiter: Union[_SimpleChanItemReader[T], _SimpleChanItemWriter[T]], 
+        wait: Awaitable[Any], 
+        timeout: Optional[float], 
+        ctx: Optional[Context],
+    ) -> Any:
+        # one timer on the loop, plus one callback reader on ctx.done()
+        loop = waiter._loop
+        handle: Optional[asyncio.TimerHandle] = None
+        done: Optional[Union[Chan[None], Signal[None]]] = None
+        hook_node: Optional[LinkedNode] = None
+        if timeout is not None:
+            handle = loop.call_later(timeout, self._expire, waiter, None)
+        if ctx is not None:
+            done = ctx.done()
+            hook = _CallbackChanItemReader(loop, lambda: self._expire(waiter, ctx))
+            received, _, _, hook_node = done._recv_or_register(hook)
+            if received:
+                self._expire(waiter, ctx)
+        try:
+            return await wait
+        finally:
+            if handle is not None:
+                handle.cancel()
+            if hook_node is not None:
+                done._release_node(hook_node) # type: ignore
+
+
+    def _expire(self, waiter: Union[_SimpleChanItemReader[T], _SimpleChanItemWriter[T]], ctx: Optional[Context]):
+        # runs on the waiter's loop
+        self._call_locked(self._expire_inner, waiter, ctx)
+
+
+    def _expire_inner(self, waiter: Union[_SimpleChanItemReader[T], _SimpleChanItemWriter[T]], ctx: Optional[Context]):
+        if waiter._future.done():
+            return
+        node = waiter._node
+        if node is not None:
+            if node.list is None:
+                # already matched, the result is on its way
+                return
+            node.delete()
+            if self._weighted:
+                self._admit_inner()
+        if ctx is None:
+            waiter._future.set_exception(ChanTimeoutError('chan timeout'))
+        else:
+            err = ctx.err()
+            assert err is not None
+            waiter._future.set_exception(err)
+
+
+    def _abandon_reader_inner(self, reader: _SimpleChanItemReader[T]):
+        node = reader._node
+        if node is not None and node.list is not None:
+            # still waiting, just leave
+            node.delete()
+            return
+        future = reader._future
+        if future.done() and not future.cancelled():
+            # an item was handed over already
+            item, ok = future.result()
+            if ok:
+                reader._give_back_inner(item) # type: ignore
+
+
+    def _requeue_inner(self, item: T):
+        # an item taken by a waiter who then gave up, goes back to the front
+        if self._put_reader(item):
+            return
+        if self._buffsize > 0 or self._weighted:
+            # may go over buffsize by one for a moment
+            self._buff.appendleft(item)
+        elif self._closed:
+            self._return_inner(item, True)
+        else:
+            self._writers.appendleft(_RequeuedChanItemWriter(item))
+
+
+    def _return_inner(self, item: T, first: bool):
+        if self._returned is None:
+            self._returned = deque()
+        if first:
+            self._returned.appendleft(item)
+        else:
+            self._returned.append(item)
+
+
+    def _send_inner(self, item: T) -> bool:
+        ''' return sent: bool
+        '''
+        if self._closed:
+            raise ChanClosedError('chan closed')
+
+        if self._readers and self._put_reader(item):
+            return True
+
         if len(self._buff) < self._buffsize:
             # send
             self._buff.append(item)
             return True
+
+        # queued writers go first, even if item would fit
+        if self._weighted and not self._writers and self._buff.try_append(item): # type: ignore
+            return True
+
+        if self._overflow != 'block':
+            self._shed_inner(item)
+            return True
         
         return False
 
 
+    def _shed_inner(self, item: T):
+        ''' send item to a full chan by its overflow policy
+        '''
+        if self._overflow == 'drop_newest':
+            self._dropped += 1
+        elif self._weighted:
+            while not self._buff.try_append(item): # type: ignore
+                self._buff.popleft()
+                self._dropped += 1
+        else:
+            self._buff.popleft()
+            self._dropped += 1
+            self._buff.append(item)
+
+
+    def _admit_inner(self):
+        ''' move queued writers into a weighted buffer, in order, as long as they fit
+        '''
+        buff: _WeightedBuffer[T] = self._buff # type: ignore
+        while self._writers:
+            writer = self._writers.left().val
+            lock = writer.getlock()
+            if lock:
+                lock.acquire()
+            try:
+                if not writer.discarded():
+                    if not buff.try_append(writer._item): # type: ignore
+                        return
+                    writer.take()
+                self._writers.popleft()
+            finally:
+                if lock:
+                    lock.release()
+
+
+    def _put_reader(self, item: T) -> bool:
+        ''' hand item to the first live reader, return whether there was one
+        '''
+        while self._readers:
+            reader = self._readers.popleft()
+            if reader.discarded():
+                # a discarded waiter stays so while we hold the chan lock
+                continue
+            lock = reader.getlock()
+            if lock:
+                lock.acquire()
+            try:
+                if not reader.discarded():
+                    # send
+                    reader.put(item, True)
+                    return True
+            finally:
+                if lock:
+                    lock.release()
+        return False
+
+
     def _recv_inner(self) -> Tuple[bool, Optional[T], bool]:
         ''' return (received, item, ok)
         '''
         if self._closed:
+            if self._returned:
+                return True, self._returned.popleft(), True
             if self._buff:
                 item = self._buff.popleft()
                 return True, item, True
             else:
                 return True, None, False
+
+        if self._weighted:
+            # writers only ever wait for room in the buffer
+            if self._buff:
+                item = self._buff.popleft()
+                self._admit_inner()
+                return True, item, True
+            return False, None, False
             
         while self._writers:
             writer = self._writers.popleft()
+            if writer.discarded():
+                continue
             lock = writer.getlock()
             if lock:
                 lock.acquire()
             try:
                 if not writer.discarded():
-                    # recv
+                    # recv, a typed chan took the item as it would store it, so the
+                    # rotation can't fail once it is taken
                     item = writer.take()
                     if self._buff:
                         temp = item
@@ -351,94 +1393,178 @@ class Chan(Generic[T]):
         return False, None, False
 
 
-    def _send_with_mutex(self, item: T, group: _MutexGroup, id: int):
+    def _recv_many_inner(self, max_n: int) -> Tuple[List[T], bool]:
+        ''' return (items, ok), ok is False only if closed and nothing left
+        '''
+        items: List[T] = []
+        while len(items) < max_n:
+            received, item, ok = self._recv_inner()
+            if not received:
+                break
+            if not ok:
+                return items, len(items) > 0
+            items.append(item) # type: ignore
+        return items, True
+
+
+    def _recv_many_into_inner(self, view: memoryview) -> Tuple[int, bool]:
+        ''' like _recv_many_inner, but buffered items are copied as whole slices
+        '''
+        n = 0
+        if not self._writers:
+            # no writer to rotate in, so the buffer can be drained in bulk
+            n = self._buff.popleft_into(view, len(view)) # type: ignore
+        while n < len(view):
+            received, item, ok = self._recv_inner()
+            if not received:
+                break
+            if not ok:
+                return n, n > 0
+            view[n] = item
+            n += 1
+        return n, True
+
+
+    def _send_with_mutex(self, item: T, group: _MutexGroup, id: int, writer: Optional[_MutexChanItemWriter[T]] = None):
         if group.done():
             return
         
+        if self._affine:
+            self._check_affinity()
+            self._send_with_mutex_inner(item, group, id, writer)
+            return
         with self._lock:
-            if self._closed:
-                raise ChanClosedError('chan closed')
-
-            for rnode in self._readers.iternodes():
-                reader = rnode.val
-                lock_g = group.getlock()
-                lock_r = reader.getlock()
-                if lock_g is lock_r:
-                    # one mutex group, just skip
+            self._send_with_mutex_inner(item, group, id, writer)
+
+
+    def _send_with_mutex_inner(self, item: T, group: _MutexGroup, id: int, writer: Optional[_MutexChanItemWriter[T]]):
+        if self._closed:
+            raise ChanClosedError('chan closed')
+
+        for rnode in self._readers.iternodes():
+            reader = rnode.val
+            lock_g = group.getlock()
+            lock_r = reader.getlock()
+            if lock_g is lock_r:
+                # one mutex group, just skip
+                continue
+            with _GeminiLock(lock_g, lock_r) if lock_r else lock_g:
+                if group.done():
+                    return
+                # delete node anyway
+                rnode.delete()
+                if reader.discarded():
                     continue
-                with _GeminiLock(lock_g, lock_r) if lock_r else lock_g:
-                    if group.done():
-                        return
-                    # delete node anyway
-                    rnode.delete()
-                    if reader.discarded():
-                        continue
-                    # both ready
-                    reader.put(item, True)
+                # both ready
+                reader.put(item, True)
+                group.set_result(id, item, True)
+                return
+
+        if len(self._buff) < self._buffsize:
+            with group.getlock():
+                if not group.done():
+                    self._buff.append(item)
+                    group.set_result(id, item, True)
+            return
+
+        if self._weighted and not self._writers:
+            with group.getlock():
+                if group.done():
+                    return
+                if self._buff.try_append(item): # type: ignore
                     group.set_result(id, item, True)
                     return
 
-            if len(self._buff) < self._buffsize:
-                with group.getlock():
-                    if not group.done():
-                        self._buff.append(item)
-                        group.set_result(id, item, True)
-                return
-            
+        if self._overflow != 'block':
+            with group.getlock():
+                if not group.done():
+                    self._shed_inner(item)
+                    group.set_result(id, item, True)
+            return
+        
+        if writer is None:
             writer = _MutexChanItemWriter(id, item, group)
-            node = self._writers.append(writer)
-            group.add_node(node, self)
-    
-    
-    def _recv_with_mutex(self, group: _MutexGroup, id: int):
+        else:
+            writer._item = item
+        node = self._writers.append(writer)
+        group.add_node(node, self)
+        if len(self._readers) + len(self._writers) > self._sweep_at:
+            self._sweep_inner()
+
+
+    def _recv_with_mutex(self, group: _MutexGroup, id: int, reader: Optional[_MutexChanItemReader[T]] = None):
         if group.done():
             return
         
+        if self._affine:
+            self._check_affinity()
+            self._recv_with_mutex_inner(group, id, reader)
+            return
         with self._lock:
-            if self._closed:
-                # close the group as reader
-                with group.getlock():
-                    if not group.done():
-                        if self._buff:
-                            item = self._buff.popleft()
-                            group.set_result(id, item, True)
-                        else:
-                            group.set_result(id, None, False)
-                return
-            
-            for wnode in self._writers.iternodes():
-                writer = wnode.val
-                lock_g = group.getlock()
-                lock_w = writer.getlock()
-                if lock_g is lock_w:
-                    # one mutex group, just skip
-                    continue
-                with _GeminiLock(lock_g, lock_w) if lock_w else lock_g:
-                    if group.done():
-                        return
-                    # delete node anyway
-                    wnode.delete()
-                    if writer.discarded():
-                        continue
-                    # both ready
-                    item = writer.take()
-                    if self._buff:
-                        temp = item
+            self._recv_with_mutex_inner(group, id, reader)
+
+
+    def _recv_with_mutex_inner(self, group: _MutexGroup, id: int, reader: Optional[_MutexChanItemReader[T]]):
+        if self._closed:
+            # close the group as reader
+            with group.getlock():
+                if not group.done():
+                    if self._returned:
+                        group.set_result(id, self._returned.popleft(), True, self)
+                    elif self._buff:
                         item = self._buff.popleft()
-                        self._buff.append(temp)
-                    group.set_result(id, item, True)
-                    return
-            
+                        group.set_result(id, item, True, self)
+                    else:
+                        group.set_result(id, None, False)
+            return
+
+        if self._weighted:
+            # writers only ever wait for room in the buffer
             if self._buff:
                 with group.getlock():
                     if not group.done():
                         item = self._buff.popleft()
-                        group.set_result(id, item, True)
+                        group.set_result(id, item, True, self)
+                # outside the group lock, queued writers may be other groups
+                self._admit_inner()
                 return
-            
-            reader = _MutexChanItemReader(id, group)
-            node = self._readers.append(reader)
-            group.add_node(node, self)
+        
+        for wnode in self._writers.iternodes():
+            writer = wnode.val
+            lock_g = group.getlock()
+            lock_w = writer.getlock()
+            if lock_g is lock_w:
+                # one mutex group, just skip
+                continue
+            with _GeminiLock(lock_g, lock_w) if lock_w else lock_g:
+                if group.done():
+                    return
+                # delete node anyway
+                wnode.delete()
+                if writer.discarded():
+                    continue
+                # both ready
+                item = writer.take()
+                if self._buff:
+                    temp = item
+                    item = self._buff.popleft()
+                    self._buff.append(temp)
+                group.set_result(id, item, True, self)
+                return
+        
+        if self._buff:
+            with group.getlock():
+                if not group.done():
+                    item = self._buff.popleft()
+                    group.set_result(id, item, True, self)
+            return
+        
+        if reader is None:
+            reader = _MutexChanItemReader(id, group, self)
+        node = self._readers.append(reader)
+        group.add_node(node, self)
+        if len(self._readers) + len(self._writers) > self._sweep_at:
+            self._sweep_inner()
 
 
     def __aiter__(self):
@@ -455,15 +1581,31 @@ class Chan(Generic[T]):
 
 
 class _NilChan(Chan[T]):
+    def __init__(self):
+        super().__init__(loop_affine=False)
+
     def close(self):
         raise Exception('closing nil chan')
     
-    async def send(self, item: T):
+    async def send(self, item: T, timeout: Optional[float] = None, ctx: Optional[Context] = None):
+        if ctx is not None and ctx.err() is not None:
+            raise ctx.err() # type: ignore
+        # never queued, so it can only time out
+        writer = _SimpleChanItemWriter(self, item)
+        await self._wait_bounded(writer, writer.write(), timeout, ctx)
+
+    async def recv(self, timeout: Optional[float] = None, ctx: Optional[Context] = None) -> Tuple[Optional[T], bool]:
+        if ctx is not None and ctx.err() is not None:
+            raise ctx.err() # type: ignore
+        reader = _SimpleChanItemReader(self)
+        return await self._wait_bounded(reader, reader.read(), timeout, ctx)
+
+    async def send_many(self, items: Iterable[T]):
         fut = asyncio.Future()
         await fut
 
-    async def recv(self) -> Tuple[Optional[T], bool]:
-        fut: asyncio.Future[Tuple[Optional[T], bool]] = asyncio.Future()
+    async def recv_many(self, max_n: int) -> Tuple[List[T], bool]:
+        fut: asyncio.Future[Tuple[List[T], bool]] = asyncio.Future()
         return await fut
 
     def send_nowait(self, item: T) -> bool:
@@ -472,65 +1614,1761 @@ class _NilChan(Chan[T]):
     def recv_nowait(self) -> Tuple[bool, Optional[T], bool]:
         return False, None, False
 
-    def _send_with_mutex(self, item: T, group: _MutexGroup, id: int):
+    def send_many_nowait(self, items: Iterable[T]) -> int:
+        return 0
+
+    def recv_many_nowait(self, max_n: int) -> Tuple[List[T], bool]:
+        return [], True
+
+    def send_sync(self, item: T, timeout: Optional[float] = None):
+        _check_sync('send_sync')
+        self._block_sync(timeout)
+
+    def recv_sync(self, timeout: Optional[float] = None) -> Tuple[Optional[T], bool]:
+        _check_sync('recv_sync')
+        self._block_sync(timeout)
+
+    def recv_many_sync(self, max_n: int, timeout: Optional[float] = None) -> Tuple[List[T], bool]:
+        if max_n <= 0:
+            raise ValueError('max_n must be positive')
+        _check_sync('recv_many_sync')
+        self._block_sync(timeout)
+
+    def _block_sync(self, timeout: Optional[float]) -> NoReturn:
+        # never released, so it can only time out
+        wakeup = Lock()
+        wakeup.acquire()
+        wakeup.acquire(timeout=-1 if timeout is None else timeout)
+        raise ChanTimeoutError('chan timeout')
+
+    def _send_with_mutex(self, item: T, group: _MutexGroup, id: int, writer: Optional[_MutexChanItemWriter[T]] = None):
         return
     
-    def _recv_with_mutex(self, group: _MutexGroup, id: int):
+    def _recv_with_mutex(self, group: _MutexGroup, id: int, reader: Optional[_MutexChanItemReader[T]] = None):
         return
 
+    def _recv_or_register(self, reader: _ChanItemReader[T]) -> Tuple[bool, Optional[T], bool, Optional[LinkedNode]]:
+        return False, None, False, None
+
 
 nilchan = _NilChan()
 
 
-async def select(*ops: Union[Chan[Any], _CaseRecv[Any], _CaseSend[Any]], default: bool = False) -> Tuple[int, Any, bool]:
-    closedError: Optional[ChanClosedError] = None
-    if default:
-        for id, op in enumerate(ops):
-            if isinstance(op, Chan):
-                success, item, ok = op.recv_nowait()
-                if success:
-                    return id, item, ok
-            elif isinstance(op, _CaseRecv):
-                success, item, ok = op.chan.recv_nowait()
-                if success:
-                    return id, item, ok
-            elif isinstance(op, _CaseSend):
-                try:
-                    success = op.chan.send_nowait(op.item)
-                    if success:
-                        return id, op.item, True
-                except ChanClosedError as ex:
-                    closedError = ex
-            else:
-                raise TypeError(f'unsupported case type {type(op)} for select')
-        
-        if closedError:
-            raise closedError
-        else:
-            return -1, None, False
-    
-    else:
-        group = _MutexGroup()
-        try:
-            for id, op in enumerate(ops):
-                if isinstance(op, Chan):
-                    op._recv_with_mutex(group, id)
-                elif isinstance(op, _CaseRecv):
-                    op.chan._recv_with_mutex(group, id)
-                elif isinstance(op, _CaseSend):
-                    try:
-                        op.chan._send_with_mutex(op.item, group, id)
-                    except ChanClosedError as ex:
-                        closedError = ex
-                else:
-                    raise TypeError(f'unsupported case type {type(op)} for select')
+# priority chan
 
-            if closedError and not group.done():
+class _PriorityBuffer(Generic[T]):
+    ''' one FIFO per level, popping from the highest non-empty one
+    '''
+    __slots__ = ('_queues', '_mask', '_count')
+
+    def __init__(self, levels: int):
+        self._queues: List[Deque[T]] = [deque() for _ in range(levels)]
+        # bit i is set if level i is non-empty
+        self._mask = 0
+        self._count = 0
+
+
+    def push(self, level: int, item: T):
+        self._queues[level].append(item)
+        self._mask |= 1 << level
+        self._count += 1
+
+
+    def appendleft(self, level: int, item: T):
+        # a requeued item goes out first within its level
+        self._queues[level].appendleft(item)
+        self._mask |= 1 << level
+        self._count += 1
+
+
+    def top(self) -> int:
+        ''' the highest non-empty level, -1 if empty
+        '''
+        return self._mask.bit_length() - 1
+
+
+    def popleft(self) -> T:
+        level = self._mask.bit_length() - 1
+        if level < 0:
+            raise IndexError('pop from an empty priority buffer')
+        queue = self._queues[level]
+        item = queue.popleft()
+        if not queue:
+            self._mask &= ~(1 << level)
+        self._count -= 1
+        return item
+
+
+    def __len__(self):
+        return self._count
+
+
+    def __bool__(self):
+        return self._count > 0
+
+
+
+class _PriorityWriters:
+    ''' blocked writers queued by level, standing in for a chan's writer list
+    '''
+    __slots__ = ('_lists',)
+
+    def __init__(self, levels: int):
+        self._lists: List[LinkedList[_ChanItemWriter[Any]]] = [LinkedList() for _ in range(levels)]
+
+
+    def append(self, writer: _ChanItemWriter[Any], level: int) -> LinkedNode:
+        return self._lists[level].append(writer)
+
+
+    def appendleft(self, writer: _ChanItemWriter[Any], level: int) -> LinkedNode:
+        return self._lists[level].appendleft(writer)
+
+
+    def popleft(self) -> _ChanItemWriter[Any]:
+        return self.popleft_level()[0]
+
+
+    def popleft_level(self) -> Tuple[_ChanItemWriter[Any], int]:
+        for level in range(len(self._lists) - 1, -1, -1):
+            lst = self._lists[level]
+            if lst:
+                return lst.popleft(), level
+        raise IndexError('pop from empty priority writers')
+
+
+    def iternodes_level(self):
+        for level in range(len(self._lists) - 1, -1, -1):
+            for node in self._lists[level].iternodes():
+                yield node, level
+
+
+    def __len__(self):
+        return sum(len(lst) for lst in self._lists)
+
+
+    def __bool__(self):
+        return any(self._lists)
+
+
+
+class _PrioritySend(_SelectCase):
+    __slots__ = ('chan', 'item', 'priority')
+
+    def __init__(self, chan: PriorityChan[Any], item: Any, priority: int):
+        self.chan = chan
+        self.item = item
+        self.priority = priority
+
+    def _select_try(self) -> Tuple[bool, Any, bool]:
+        if self.chan.send_nowait(self.item, priority=self.priority):
+            return True, self.item, True
+        return False, None, False
+
+    def _select_register(self, group: _MutexGroup, id: int):
+        self.chan._send_with_mutex(self.item, group, id, None, self.priority)
+
+
+# readers of a priority chan remember the level of the item handed to them, so that
+# one given back goes to the front of that level rather than jumping ahead of others
+
+class _PriorityChanItemReader(_SimpleChanItemReader[T]):
+    __slots__ = ('_level',)
+
+    def __init__(self, chan: PriorityChan[T]):
+        super().__init__(chan)
+        self._level = 0
+
+    def _give_back_inner(self, item: T):
+        self._chan._requeue_inner(item, self._level) # type: ignore
+
+
+class _PriorityMutexChanItemReader(_MutexChanItemReader[T]):
+    __slots__ = ('_level',)
+
+    def __init__(self, id: int, group: _MutexGroup, chan: PriorityChan[T]):
+        super().__init__(id, group, chan)
+        self._level = 0
+
+    def put(self, item: T, ok: bool):
+        self._group.set_result(self._id, item, ok, self._chan, self._level)
+
+
+class PriorityChan(Chan[T]):
+    ''' a chan handing out items by priority, highest first, and in order within a level
+
+    Priorities are 0 to levels - 1. Senders blocked on a full chan are taken by
+    priority too, ahead of buffered items of a lower level.
+    '''
+    def __init__(self, levels: int, buffsize: int = 0, loop_affine: Optional[bool] = None):
+        if levels <= 0:
+            raise ValueError('levels must be positive')
+        super().__init__(buffsize, loop_affine)
+        self._levels = levels
+        self._buff: Union[_PriorityBuffer[T], Deque[T]] = _PriorityBuffer(levels) if buffsize > 0 else _empty_deque # type: ignore
+        self._writers: _PriorityWriters = _PriorityWriters(levels) # type: ignore
+        # its select waiters aren't swept
+        self._lazy_release = False
+
+
+    async def send(
+        self, 
+        item: T, 
+        timeout: Optional[float] = None, 
+        ctx: Optional[Context] = None,
+        *,
+        priority: int = 0, 
+    ):
+        self._check_priority(priority)
+        if ctx is not None and ctx.err() is not None:
+            raise ctx.err() # type: ignore
+        if self._affine:
+            self._check_affinity()
+            writer = self._send_or_wait(item, priority)
+        else:
+            with self._lock:
+                writer = self._send_or_wait(item, priority)
+        if writer is None:
+            return
+        if timeout is None and ctx is None:
+            await writer.write()
+        else:
+            await self._wait_bounded(writer, writer.write(), timeout, ctx)
+
+
+    async def send_many(self, items: Iterable[T], *, priority: int = 0):
+        self._check_priority(priority)
+        if self._affine:
+            self._check_affinity()
+            state = self._send_many_or_wait(items, priority)
+        else:
+            with self._lock:
+                state = self._send_many_or_wait(items, priority)
+        if state is not None:
+            await state.wait()
+
+
+    def send_nowait(self, item: T, *, priority: int = 0) -> bool:
+        self._check_priority(priority)
+        if self._affine:
+            self._check_affinity()
+            return self._send_inner(item, priority)
+        with self._lock:
+            return self._send_inner(item, priority)
+
+
+    def send_sync(self, item: T, timeout: Optional[float] = None, *, priority: int = 0):
+        self._check_priority(priority)
+        _check_sync('send_sync')
+        writer = self._call_locked(self._send_or_wait_sync, item, priority)
+        if writer is not None:
+            self._wait_sync(writer, timeout)
+
+
+    def send_many_nowait(self, items: Iterable[T], *, priority: int = 0) -> int:
+        self._check_priority(priority)
+        if self._affine:
+            self._check_affinity()
+            return self._send_many_inner(items, priority)
+        with self._lock:
+            return self._send_many_inner(items, priority)
+
+
+    def case_send(self, item: T, *, priority: int = 0) -> _PrioritySend: # type: ignore
+        self._check_priority(priority)
+        return _PrioritySend(self, item, priority)
+
+
+    def _check_priority(self, priority: int):
+        if not isinstance(priority, int) or isinstance(priority, bool):
+            raise TypeError(f'priority must be an int, not {type(priority).__name__}')
+        if not 0 <= priority < self._levels:
+            raise ValueError(f'priority {priority} out of range for {self._levels} levels')
+
+
+    def _send_or_wait(self, item: T, priority: int = 0) -> Optional[_SimpleChanItemWriter[T]]:
+        if self._send_inner(item, priority):
+            return None
+        writer = _SimpleChanItemWriter(self, item)
+        writer._node = self._writers.append(writer, priority)
+        return writer
+
+
+    def _send_or_wait_sync(self, item: T, priority: int = 0) -> Optional[_ThreadChanItemWriter[T]]:
+        if self._send_inner(item, priority):
+            return None
+        writer = _ThreadChanItemWriter(item)
+        writer._node = self._writers.append(writer, priority)
+        return writer
+
+
+    def _send_many_inner(self, items: Iterable[T], priority: int = 0) -> int:
+        sent = 0
+        for item in items:
+            if not self._send_inner(item, priority):
+                break
+            sent += 1
+        return sent
+
+
+    def _send_many_or_wait(self, items: Iterable[T], priority: int = 0) -> Optional[_BatchWriteState]:
+        it = iter(items)
+        for item in it:
+            if not self._send_inner(item, priority):
+                break
+        else:
+            return None
+
+        rest = [item]
+        rest.extend(it)
+        state = _BatchWriteState(self, len(rest))
+        for item in rest:
+            state.nodes.append(self._writers.append(_BatchChanItemWriter(item, state), priority))
+        return state
+
+
+    def _send_inner(self, item: T, priority: int = 0) -> bool:
+        if self._closed:
+            raise ChanClosedError('chan closed')
+
+        if self._readers and self._put_reader(item, priority):
+            return True
+
+        if len(self._buff) < self._buffsize:
+            self._buff.push(priority, item) # type: ignore
+            return True
+        
+        return False
+
+
+    def _put_reader(self, item: T, level: Optional[int] = None) -> bool:
+        if level is None:
+            level = self._levels - 1
+        while self._readers:
+            reader = self._readers.popleft()
+            if reader.discarded():
+                continue
+            lock = reader.getlock()
+            if lock:
+                lock.acquire()
+            try:
+                if not reader.discarded():
+                    if isinstance(reader, (_PriorityChanItemReader, _PriorityMutexChanItemReader)):
+                        reader._level = level
+                    reader.put(item, True)
+                    return True
+            finally:
+                if lock:
+                    lock.release()
+        return False
+
+
+    def _requeue_inner(self, item: T, level: Optional[int] = None):
+        # to the front of its own level, the top one if that isn't known
+        if level is None:
+            level = self._levels - 1
+        if self._put_reader(item, level):
+            return
+        if self._buffsize > 0:
+            self._buff.appendleft(level, item) # type: ignore
+        elif self._closed:
+            self._return_inner(item, True)
+        else:
+            self._writers.appendleft(_RequeuedChanItemWriter(item), level)
+
+
+    def _recv_wait(self) -> _SimpleChanItemReader[T]:
+        reader = _PriorityChanItemReader(self)
+        reader._node = self._readers.append(reader)
+        return reader
+
+
+    def _recv_inner(self) -> Tuple[bool, Optional[T], bool]:
+        if self._closed:
+            return super()._recv_inner()
+
+        buff = self._buff
+        while self._writers:
+            writer, level = self._writers.popleft_level()
+            lock = writer.getlock()
+            if lock:
+                lock.acquire()
+            try:
+                if not writer.discarded():
+                    item = writer.take()
+                    item, _ = self._rotate_inner(item, level)
+                    return True, item, True
+            finally:
+                if lock:
+                    lock.release()
+
+        if buff:
+            return True, buff.popleft(), True
+        return False, None, False
+
+
+    def _rotate_inner(self, item: T, level: int) -> Tuple[T, int]:
+        ''' return (item, level) taken from a writer at level, or a buffered one to go first
+        '''
+        buff = self._buff
+        # the buffered ones of the same level are older
+        if buff:
+            top = buff.top() # type: ignore
+            if top >= level:
+                buffered = buff.popleft()
+                buff.push(level, item) # type: ignore
+                return buffered, top
+        return item, level
+
+
+    def _send_with_mutex(
+        self, 
+        item: T, 
+        group: _MutexGroup, 
+        id: int, 
+        writer: Optional[_MutexChanItemWriter[T]] = None, 
+        priority: int = 0,
+    ):
+        if group.done():
+            return
+        
+        if self._affine:
+            self._check_affinity()
+            self._send_with_mutex_inner(item, group, id, writer, priority)
+            return
+        with self._lock:
+            self._send_with_mutex_inner(item, group, id, writer, priority)
+
+
+    def _send_with_mutex_inner(
+        self, 
+        item: T, 
+        group: _MutexGroup, 
+        id: int, 
+        writer: Optional[_MutexChanItemWriter[T]], 
+        priority: int = 0,
+    ):
+        if self._closed:
+            raise ChanClosedError('chan closed')
+
+        for rnode in self._readers.iternodes():
+            reader = rnode.val
+            lock_g = group.getlock()
+            lock_r = reader.getlock()
+            if lock_g is lock_r:
+                # one mutex group, just skip
+                continue
+            with _GeminiLock(lock_g, lock_r) if lock_r else lock_g:
+                if group.done():
+                    return
+                rnode.delete()
+                if reader.discarded():
+                    continue
+                if isinstance(reader, (_PriorityChanItemReader, _PriorityMutexChanItemReader)):
+                    reader._level = priority
+                reader.put(item, True)
+                group.set_result(id, item, True)
+                return
+
+        if len(self._buff) < self._buffsize:
+            with group.getlock():
+                if not group.done():
+                    self._buff.push(priority, item) # type: ignore
+                    group.set_result(id, item, True)
+            return
+        
+        if writer is None:
+            writer = _MutexChanItemWriter(id, item, group)
+        else:
+            writer._item = item
+        node = self._writers.append(writer, priority)
+        group.add_node(node, self)
+
+
+    def _recv_with_mutex_inner(self, group: _MutexGroup, id: int, reader: Optional[_MutexChanItemReader[T]]):
+        if self._closed:
+            super()._recv_with_mutex_inner(group, id, reader)
+            return
+        
+        for wnode, level in self._writers.iternodes_level():
+            writer = wnode.val
+            lock_g = group.getlock()
+            lock_w = writer.getlock()
+            if lock_g is lock_w:
+                # one mutex group, just skip
+                continue
+            with _GeminiLock(lock_g, lock_w) if lock_w else lock_g:
+                if group.done():
+                    return
+                wnode.delete()
+                if writer.discarded():
+                    continue
+                item = writer.take()
+                item, level = self._rotate_inner(item, level)
+                group.set_result(id, item, True, self, level)
+                return
+        
+        if self._buff:
+            with group.getlock():
+                if not group.done():
+                    level = self._buff.top() # type: ignore
+                    item = self._buff.popleft()
+                    group.set_result(id, item, True, self, level)
+            return
+        
+        if not isinstance(reader, _PriorityMutexChanItemReader):
+            # a Selector's plain reader can't tell the level back
+            reader = _PriorityMutexChanItemReader(id, group, self)
+        node = self._readers.append(reader)
+        group.add_node(node, self)
+
+
+# order of scanning ready cases
+Fairness = Literal['ordered', 'random', 'round_robin']
+
+# rotating start for round robin in plain select, shared by all call sites
+_round_robin = count()
+
+
+def _case_order(n: int, fairness: Fairness, start: int) -> Iterable[int]:
+    if fairness == 'ordered':
+        return range(n)
+    elif fairness == 'random':
+        return random.sample(range(n), n) if n > 1 else range(n)
+    elif fairness == 'round_robin':
+        if n < 2:
+            return range(n)
+        start %= n
+        return chain(range(start, n), range(start))
+    else:
+        raise ValueError(f'unknown select fairness {fairness!r}')
+
+
+def _select_nowait(ops: Tuple[Any, ...], order: Iterable[int]) -> Tuple[int, Any, bool, Optional[ChanClosedError]]:
+    ''' return (id, item, ok, closed_error), id is -1 if no case is ready
+    '''
+    closedError: Optional[ChanClosedError] = None
+    for id in order:
+        op = ops[id]
+        if isinstance(op, Chan):
+            success, item, ok = op.recv_nowait()
+            if success:
+                return id, item, ok, None
+        elif isinstance(op, _CaseRecv):
+            success, item, ok = op.chan.recv_nowait()
+            if success:
+                return id, item, ok, None
+        elif isinstance(op, _CaseSend):
+            try:
+                success = op.chan.send_nowait(op.item)
+                if success:
+                    return id, op.item, True, None
+            except ChanClosedError as ex:
+                closedError = ex
+        elif isinstance(op, _SelectCase):
+            try:
+                success, item, ok = op._select_try()
+                if success:
+                    return id, item, ok, None
+            except ChanClosedError as ex:
+                closedError = ex
+        else:
+            raise TypeError(f'unsupported case type {type(op)} for select')
+    return -1, None, False, closedError
+
+
+async def _select_blocking(ops: Tuple[Any, ...]) -> Tuple[int, Any, bool]:
+    closedError: Optional[ChanClosedError] = None
+    group = _MutexGroup()
+    try:
+        for id, op in enumerate(ops):
+            if isinstance(op, Chan):
+                op._recv_with_mutex(group, id)
+            elif isinstance(op, _CaseRecv):
+                op.chan._recv_with_mutex(group, id)
+            elif isinstance(op, _CaseSend):
+                try:
+                    op.chan._send_with_mutex(op.item, group, id)
+                except ChanClosedError as ex:
+                    closedError = ex
+            elif isinstance(op, _SelectCase):
+                try:
+                    op._select_register(group, id)
+                except ChanClosedError as ex:
+                    closedError = ex
+            else:
+                raise TypeError(f'unsupported case type {type(op)} for select')
+
+        if closedError and not group.done():
+            with group.getlock():
+                if not group.done():
+                    group.set_exception(closedError)
+        
+        return await group._future
+    
+    except asyncio.CancelledError:
+        group.abandon()
+        raise
+
+    finally:
+        group.release()
+
+
+async def select(
+    *ops: Union[Chan[Any], _CaseRecv[Any], _CaseSend[Any], _SelectCase], 
+    default: bool = False, 
+    fairness: Fairness = 'ordered',
+) -> Tuple[int, Any, bool]:
+    # try every case first, and only build a mutex group if none is ready
+    start = next(_round_robin) if fairness == 'round_robin' else 0
+    id, item, ok, closedError = _select_nowait(ops, _case_order(len(ops), fairness, start))
+    if id >= 0:
+        return id, item, ok
+    if closedError:
+        raise closedError
+    if default:
+        return -1, None, False
+    return await _select_blocking(ops)
+
+
+class Selector:
+    ''' a fixed set of select cases, reusing its group and waiters between rounds
+    '''
+    def __init__(
+        self, 
+        *ops: Union[Chan[Any], _CaseRecv[Any], _CaseSend[Any], _SelectCase], 
+        fairness: Fairness = 'ordered',
+    ):
+        _case_order(0, fairness, 0) # validate
+        cases: List[Union[Chan[Any], _CaseSend[Any], _SelectCase]] = []
+        for op in ops:
+            if isinstance(op, (Chan, _SelectCase)):
+                cases.append(op)
+            elif isinstance(op, _CaseRecv):
+                cases.append(op.chan)
+            elif isinstance(op, _CaseSend):
+                # own copy, so that set_item won't touch the caller's case
+                cases.append(_CaseSend(op.chan, op.item))
+            else:
+                raise TypeError(f'unsupported case type {type(op)} for select')
+        self._cases = tuple(cases)
+        self._group: Optional[_MutexGroup] = None
+        self._waiters: List[Union[_MutexChanItemReader[Any], _MutexChanItemWriter[Any], None]] = []
+        self._selecting = False
+        self._fairness = fairness
+        # round robin starts right after the last winner
+        self._next_start = 0
+
+
+    def set_item(self, id: int, item: Any):
+        case = self._cases[id]
+        if not isinstance(case, _CaseSend):
+            raise ValueError(f'case {id} is not a send case')
+        case.item = item
+
+
+    async def select(self, default: bool = False) -> Tuple[int, Any, bool]:
+        if self._selecting:
+            raise RuntimeError('selector is already selecting')
+
+        order = _case_order(len(self._cases), self._fairness, self._next_start)
+        id, item, ok, closedError = _select_nowait(self._cases, order)
+        if id >= 0:
+            self._next_start = id + 1
+            return id, item, ok
+        if closedError:
+            raise closedError
+        if default:
+            return -1, None, False
+
+        self._selecting = True
+        try:
+            id, item, ok = await self._select_blocking()
+            self._next_start = id + 1
+            return id, item, ok
+        finally:
+            self._selecting = False
+
+
+    async def _select_blocking(self) -> Tuple[int, Any, bool]:
+        group = self._group
+        if group is None or group._loop is not asyncio.get_running_loop():
+            group = self._group = _MutexGroup()
+            self._waiters = [
+                _MutexChanItemWriter(id, case.item, group) if isinstance(case, _CaseSend) 
+                else None if isinstance(case, _SelectCase)
+                else _MutexChanItemReader(id, group, case)
+                for id, case in enumerate(self._cases)
+            ]
+        else:
+            group.reset()
+
+        closedError: Optional[ChanClosedError] = None
+        try:
+            for id, case in enumerate(self._cases):
+                if isinstance(case, _CaseSend):
+                    try:
+                        case.chan._send_with_mutex(case.item, group, id, self._waiters[id]) # type: ignore
+                    except ChanClosedError as ex:
+                        closedError = ex
+                elif isinstance(case, _SelectCase):
+                    try:
+                        case._select_register(group, id)
+                    except ChanClosedError as ex:
+                        closedError = ex
+                else:
+                    case._recv_with_mutex(group, id, self._waiters[id]) # type: ignore
+
+            if closedError and not group.done():
                 with group.getlock():
                     if not group.done():
                         group.set_exception(closedError)
             
             return await group._future
         
+        except asyncio.CancelledError:
+            group.abandon()
+            raise
+
         finally:
-            group.release()
+            # Waiters get reused next round, so take every chan lock even if
+            # the node is gone, in case another thread still holds a waiter.
+            for node, chan in group._nodes:
+                chan._release_node(node)
+
+
+
+# select set
+
+class _SelectSetReader(_ChanItemReader[T]):
+    __slots__ = ('_set', '_key', '_chan', '_node', '_pending', '_removed')
+
+    def __init__(self, selset: SelectSet, key: Any, chan: Chan[T]):
+        self._set = selset
+        self._key = key
+        self._chan = chan
+        self._node: Optional[LinkedNode] = None
+        self._pending: Optional[Tuple[Optional[T], bool]] = None
+        self._removed = False
+
+    def put(self, item: T, ok: bool):
+        self._set._deliver(self, item, ok)
+
+    def close(self):
+        self._set._deliver(self, None, False)
+
+    def getlock(self) -> Optional[Lock]:
+        return self._set._lock
+
+    def discarded(self) -> bool:
+        return self._removed
+
+
+class SelectSet:
+    ''' a dynamic set of recv cases keyed by the caller, for fan-in over many chans
+
+    Each chan keeps one registration that persists across rounds, and reports to
+    the set when an item arrives, so waiting costs O(ready) rather than O(cases).
+    At most one item per chan is held by the set. A closed chan is reported once,
+    with ok False, and then leaves the set.
+    '''
+    def __init__(self):
+        self._lock = Lock()
+        self._readers: Dict[Any, _SelectSetReader[Any]] = {}
+        self._ready: Deque[_SelectSetReader[Any]] = deque()
+        self._waiter: Optional[Tuple[asyncio.AbstractEventLoop, asyncio.Future[None]]] = None
+
+
+    def add(self, key: Any, chan: Chan[Any]):
+        if key in self._readers:
+            raise KeyError(f'duplicated key {key!r} in select set')
+        reader = _SelectSetReader(self, key, chan)
+        self._readers[key] = reader
+        self._arm(reader)
+
+
+    def remove(self, key: Any) -> Tuple[bool, Any, bool]:
+        ''' return (received, item, ok) for an item the set already took from the chan
+        '''
+        reader = self._readers.pop(key)
+        with self._lock:
+            reader._removed = True
+            pending = reader._pending
+            reader._pending = None
+        node = reader._node
+        if node is not None:
+            reader._chan._release_node(node)
+        if pending is None:
+            return False, None, False
+        return True, pending[0], pending[1]
+
+
+    def select_nowait(self) -> Tuple[bool, Any, Any, bool]:
+        ''' return (received, key, item, ok)
+        '''
+        with self._lock:
+            reader, item, ok = self._pop_ready()
+        if reader is None:
+            return False, None, None, False
+        return (True, *self._consumed(reader, item, ok))
+
+
+    async def select(self) -> Tuple[Any, Any, bool]:
+        ''' return (key, item, ok)
+        '''
+        while True:
+            with self._lock:
+                reader, item, ok = self._pop_ready()
+                if reader is None:
+                    if self._waiter is not None and not self._waiter[1].done():
+                        raise RuntimeError('select set is already selecting')
+                    loop = asyncio.get_running_loop()
+                    future: asyncio.Future[None] = loop.create_future()
+                    self._waiter = loop, future
+            if reader is not None:
+                return self._consumed(reader, item, ok)
+            await future
+
+
+    def __len__(self):
+        return len(self._readers)
+
+
+    def __contains__(self, key: Any) -> bool:
+        return key in self._readers
+
+
+    def _pop_ready(self) -> Tuple[Optional[_SelectSetReader[Any]], Any, bool]:
+        while self._ready:
+            reader = self._ready.popleft()
+            pending = reader._pending
+            if pending is None:
+                # removed meanwhile
+                continue
+            reader._pending = None
+            return reader, pending[0], pending[1]
+        return None, None, False
+
+
+    def _consumed(self, reader: _SelectSetReader[Any], item: Any, ok: bool) -> Tuple[Any, Any, bool]:
+        if ok:
+            # ready for the next item
+            self._arm(reader)
+        else:
+            self._readers.pop(reader._key, None)
+        return reader._key, item, ok
+
+
+    def _arm(self, reader: _SelectSetReader[Any]):
+        received, item, ok, node = reader._chan._recv_or_register(reader)
+        if received:
+            with self._lock:
+                self._deliver(reader, item, ok)
+        else:
+            reader._node = node
+
+
+    def _deliver(self, reader: _SelectSetReader[Any], item: Any, ok: bool):
+        # called with self._lock held
+        reader._node = None
+        reader._pending = item, ok
+        self._ready.append(reader)
+        waiter = self._waiter
+        if waiter is not None:
+            self._waiter = None
+            loop, future = waiter
+            if not future.done():
+                _wake_result(loop, future, None)
+
+
+
+# pipe
+
+class _PipeWaiter:
+    ''' a reader waiting for data, or a writer waiting for room, retrying once woken
+    '''
+    __slots__ = ('_node', '_loop', '_future')
+
+    def __init__(self):
+        self._node: Optional[LinkedNode] = None
+        self._loop = asyncio.get_running_loop()
+        self._future: asyncio.Future[None] = self._loop.create_future()
+
+    def rearm(self):
+        self._future = self._loop.create_future()
+
+    def notify(self, pipe: Pipe) -> bool:
+        ''' return True if the waiter is done with the pipe, else it stays queued
+        '''
+        if not self._future.done():
+            _wake_result(self._loop, self._future, None)
+        return False
+
+    def close(self):
+        if not self._future.done():
+            _wake_result(self._loop, self._future, None)
+
+
+class _MutexPipeReader:
+    __slots__ = ('_id', '_group', '_n')
+
+    def __init__(self, id: int, group: _MutexGroup, n: int):
+        self._id = id
+        self._group = group
+        self._n = n
+
+    def notify(self, pipe: Pipe) -> bool:
+        with self._group.getlock():
+            if not self._group.done():
+                if pipe._count:
+                    self._group.set_result(self._id, pipe._take(self._n), True, pipe) # type: ignore
+                else:
+                    self._group.set_result(self._id, b'', False)
+        return True
+
+    def close(self):
+        pass
+
+
+class _MutexPipeWriter:
+    __slots__ = ('_id', '_group', '_data', '_view')
+
+    def __init__(self, id: int, group: _MutexGroup, data: Any, view: memoryview):
+        self._id = id
+        self._group = group
+        self._data = data
+        self._view = view
+
+    def notify(self, pipe: Pipe) -> bool:
+        if pipe._room() < len(self._view):
+            return False
+        with self._group.getlock():
+            if not self._group.done():
+                pipe._put(self._view)
+                self._group.set_result(self._id, self._data, True)
+        return True
+
+    def close(self):
+        with self._group.getlock():
+            if not self._group.done():
+                self._group.set_exception(ChanClosedError('pipe closed'))
+
+
+class _PipeRead(_SelectCase):
+    __slots__ = ('pipe', 'n')
+
+    def __init__(self, pipe: Pipe, n: int):
+        self.pipe = pipe
+        self.n = n
+
+    def _select_try(self) -> Tuple[bool, Any, bool]:
+        pipe = self.pipe
+        with pipe._lock:
+            if pipe._count:
+                data = pipe._take(self.n)
+                pipe._settle()
+                return True, data, True
+            if pipe._closed:
+                return True, b'', False
+        return False, None, False
+
+    def _select_register(self, group: _MutexGroup, id: int):
+        pipe = self.pipe
+        if group.done():
+            return
+        with pipe._lock:
+            waiter = _MutexPipeReader(id, group, self.n)
+            if pipe._count or pipe._closed:
+                waiter.notify(pipe)
+                pipe._settle()
+                return
+            group.add_node(pipe._readers.append(waiter), pipe) # type: ignore
+
+
+class _PipeWrite(_SelectCase):
+    __slots__ = ('pipe', 'data', 'view')
+
+    def __init__(self, pipe: Pipe, data: Any):
+        self.pipe = pipe
+        self.data = data
+        self.view = memoryview(data).cast('B')
+        if len(self.view) > pipe._capacity:
+            raise ValueError('a pipe write case must fit in the pipe capacity')
+
+    def _select_try(self) -> Tuple[bool, Any, bool]:
+        pipe = self.pipe
+        with pipe._lock:
+            if pipe._closed:
+                raise ChanClosedError('pipe closed')
+            if not pipe._writers and pipe._room() >= len(self.view):
+                pipe._put(self.view)
+                pipe._settle()
+                return True, self.data, True
+        return False, None, False
+
+    def _select_register(self, group: _MutexGroup, id: int):
+        pipe = self.pipe
+        if group.done():
+            return
+        with pipe._lock:
+            if pipe._closed:
+                raise ChanClosedError('pipe closed')
+            waiter = _MutexPipeWriter(id, group, self.data, self.view)
+            if not pipe._writers and waiter.notify(pipe):
+                pipe._settle()
+                return
+            group.add_node(pipe._writers.append(waiter), pipe) # type: ignore
+
+
+class Pipe:
+    ''' a byte stream over a ring buffer, bounded by bytes in flight rather than items
+
+    Writes are copied into the ring and never interleave, a write larger than the
+    free room is copied piecewise as readers make room. Reads return as soon as any
+    data is buffered, and return nothing only once the pipe is closed and drained.
+    '''
+    def __init__(self, capacity: int = 65536):
+        if capacity <= 0:
+            raise ValueError('pipe capacity must be positive')
+        self._capacity = capacity
+        self._buf = bytearray(capacity)
+        self._view = memoryview(self._buf)
+        self._head = 0
+        self._count = 0
+        self._readers: LinkedList[Union[_PipeWaiter, _MutexPipeReader]] = LinkedList()
+        # only the leftmost writer copies into the ring, so writes stay whole
+        self._writers: LinkedList[Union[_PipeWaiter, _MutexPipeWriter]] = LinkedList()
+        self._closed = False
+        self._lock = Lock()
+
+
+    def capacity(self) -> int:
+        return self._capacity
+
+
+    def __len__(self):
+        return self._count
+
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            while self._writers:
+                self._writers.popleft().close()
+            self._settle()
+
+
+    async def write(self, data: Any):
+        ''' write all of data, any bytes-like object, waiting for room as needed
+        '''
+        view = memoryview(data).cast('B')
+        with self._lock:
+            if self._closed:
+                raise ChanClosedError('pipe closed')
+            if not view:
+                return
+            if not self._writers:
+                view = view[self._put(view):]
+                if not view:
+                    self._settle()
+                    return
+            waiter = _PipeWaiter()
+            waiter._node = self._writers.append(waiter)
+            # a select reader may make room right away, waking the waiter
+            self._settle()
+
+        try:
+            while True:
+                await waiter._future
+                with self._lock:
+                    if self._closed:
+                        raise ChanClosedError('pipe closed')
+                    view = view[self._put(view):]
+                    if not view:
+                        waiter._node.delete()
+                        self._settle()
+                        return
+                    waiter.rearm()
+                    self._settle()
+        except asyncio.CancelledError:
+            # bytes already written stay in the stream
+            with self._lock:
+                waiter._node.delete()
+                self._settle()
+            raise
+
+
+    async def read_into(self, out: Any) -> int:
+        ''' read up to len(out) bytes into out, a writable bytes-like object;
+            return 0 only if closed and drained
+        '''
+        view = memoryview(out).cast('B')
+        if not view:
+            return 0
+        return await self._read(self._get, view, 0)
+
+
+    async def read(self, n: int) -> bytes:
+        ''' read up to n bytes; return b'' only if closed and drained
+        '''
+        if n <= 0:
+            raise ValueError('n must be positive')
+        return await self._read(self._take, n, b'')
+
+
+    def case_read(self, n: int) -> _PipeRead:
+        ''' a select case, receiving up to n bytes, or b'' and ok False if closed and drained
+        '''
+        if n <= 0:
+            raise ValueError('n must be positive')
+        return _PipeRead(self, n)
+
+
+    def case_write(self, data: Any) -> _PipeWrite:
+        ''' a select case, ready only when all of data fits at once
+        '''
+        return _PipeWrite(self, data)
+
+
+    async def _read(self, consume: Callable[[Any], Any], arg: Any, eof: Any) -> Any:
+        waiter: Optional[_PipeWaiter] = None
+        while True:
+            with self._lock:
+                if self._count:
+                    result = consume(arg)
+                    self._settle()
+                    return result
+                if self._closed:
+                    return eof
+                if waiter is None:
+                    waiter = _PipeWaiter()
+                else:
+                    waiter.rearm()
+                waiter._node = self._readers.append(waiter)
+            try:
+                await waiter._future
+            except asyncio.CancelledError:
+                with self._lock:
+                    waiter._node.delete()
+                    # woken but gone, let the others have the data
+                    self._settle()
+                raise
+
+
+    def _room(self) -> int:
+        # a requeue may overfill the ring
+        return max(self._capacity - self._count, 0)
+
+
+    def _store(self, pos: int, src: memoryview):
+        size = len(self._buf)
+        first = min(len(src), size - pos)
+        self._view[pos:pos + first] = src[:first]
+        if len(src) > first:
+            self._view[:len(src) - first] = src[first:]
+
+
+    def _put(self, src: memoryview) -> int:
+        ''' copy as much of src as fits, return the number of bytes copied
+        '''
+        n = min(len(src), self._room())
+        if n > 0:
+            self._store((self._head + self._count) % len(self._buf), src[:n])
+            self._count += n
+        return n
+
+
+    def _get(self, out: memoryview) -> int:
+        n = min(len(out), self._count)
+        size = len(self._buf)
+        first = min(n, size - self._head)
+        out[:first] = self._view[self._head:self._head + first]
+        if n > first:
+            out[first:n] = self._view[:n - first]
+        self._head = (self._head + n) % size
+        self._count -= n
+        return n
+
+
+    def _take(self, n: int) -> bytes:
+        n = min(n, self._count)
+        size = len(self._buf)
+        first = min(n, size - self._head)
+        if n == first:
+            data = bytes(self._view[self._head:self._head + n])
+        else:
+            data = b''.join((self._view[self._head:], self._view[:n - first]))
+        self._head = (self._head + n) % size
+        self._count -= n
+        return data
+
+
+    def _settle(self):
+        ''' hand buffered data to readers and room to writers, until neither can proceed
+        '''
+        progress = True
+        while progress:
+            progress = False
+            while self._readers and (self._count or self._closed):
+                count = self._count
+                self._readers.popleft().notify(self)
+                progress = progress or self._count != count
+            while self._writers and self._room() and self._writers.left().val.notify(self):
+                self._writers.popleft()
+                progress = True
+
+
+    def _release_node(self, node: LinkedNode):
+        with self._lock:
+            node.delete()
+            self._settle()
+
+
+    _release_stale = _release_node
+
+
+    def _call_locked(self, func: Callable[..., Any], *args: Any) -> Any:
+        with self._lock:
+            return func(*args)
+
+
+    def _requeue_inner(self, data: bytes):
+        # a cancelled select gives back what it read, ahead of everything else
+        n = len(data)
+        if self._count + n > len(self._buf):
+            buf = bytearray(self._count + n)
+            buf[:n] = data
+            self._get(memoryview(buf)[n:])
+            self._buf = buf
+            self._view = memoryview(buf)
+            self._head = 0
+            self._count = len(buf)
+        else:
+            self._head = (self._head - n) % len(self._buf)
+            self._store(self._head, memoryview(data))
+            self._count += n
+        self._settle()
+
+
+
+# broadcast
+
+# what a broadcast does when its slowest subscriber falls a whole buffer behind
+SlowPolicy = Literal['block', 'drop', 'disconnect']
+
+
+class _BroadcastWaiter:
+    ''' a subscriber waiting for an item, or a publisher waiting for room, retrying once woken
+    '''
+    __slots__ = ('_node', '_loop', '_future')
+
+    def __init__(self):
+        self._node: Optional[LinkedNode] = None
+        self._loop = asyncio.get_running_loop()
+        self._future: asyncio.Future[None] = self._loop.create_future()
+
+    def rearm(self):
+        self._future = self._loop.create_future()
+
+    def wake(self) -> bool:
+        ''' return True if the waiter is done with its queue
+        '''
+        if not self._future.done():
+            _wake_result(self._loop, self._future, None)
+        return True
+
+
+class _MutexSubscriberReader:
+    __slots__ = ('_id', '_group', '_sub')
+
+    def __init__(self, id: int, group: _MutexGroup, sub: Subscriber[Any]):
+        self._id = id
+        self._group = group
+        self._sub = sub
+
+    def wake(self) -> bool:
+        with self._group.getlock():
+            if self._group.done():
+                return True
+            if not self._sub._ready():
+                # another subscriber's item, keep waiting
+                return False
+            _, item, ok = self._sub._recv_inner()
+            self._group.set_result(self._id, item, ok, self._sub if ok else None) # type: ignore
+            return True
+
+
+class Subscriber(_SelectCase, Generic[T]):
+    ''' a read cursor into a broadcast, also a select case receiving from it
+    '''
+    def __init__(self, bc: Broadcast[T]):
+        self._bc = bc
+        # sequence number of the next item to read
+        self._cursor = bc._head
+        self._dropped = 0
+        self._closed = False
+        self._disconnected = False
+        # items given back by cancelled selects, read first
+        self._returned: Deque[T] = deque()
+
+
+    async def recv(self) -> Tuple[Optional[T], bool]:
+        bc = self._bc
+        waiter: Optional[_BroadcastWaiter] = None
+        while True:
+            with bc._lock:
+                received, item, ok = self._recv_inner()
+                if received:
+                    return item, ok
+                if waiter is None:
+                    waiter = _BroadcastWaiter()
+                else:
+                    waiter.rearm()
+                waiter._node = bc._readers.append(waiter)
+            try:
+                await waiter._future
+            except asyncio.CancelledError:
+                # nothing is handed to a waiter, so nothing is lost
+                with bc._lock:
+                    waiter._node.delete()
+                raise
+
+
+    def recv_nowait(self) -> Tuple[bool, Optional[T], bool]:
+        with self._bc._lock:
+            return self._recv_inner()
+
+
+    def close(self):
+        ''' unsubscribe, letting the broadcast reuse the items not read yet
+        '''
+        with self._bc._lock:
+            self._leave_inner()
+
+
+    def dropped(self) -> int:
+        ''' the number of items missed for falling behind, under the 'drop' policy
+        '''
+        return self._dropped
+
+
+    def disconnected(self) -> bool:
+        ''' whether the broadcast dropped this subscriber for falling behind
+        '''
+        return self._disconnected
+
+
+    def _ready(self) -> bool:
+        bc = self._bc
+        return bool(self._returned) or self._closed or self._cursor < bc._head or bc._closed
+
+
+    def _recv_inner(self) -> Tuple[bool, Optional[T], bool]:
+        bc = self._bc
+        if self._returned:
+            return True, self._returned.popleft(), True
+        if self._closed:
+            return True, None, False
+        if self._cursor < bc._tail:
+            # lagged, the items in between are gone
+            self._dropped += bc._tail - self._cursor
+            self._cursor = bc._tail
+        if self._cursor < bc._head:
+            slot = self._cursor % bc._size
+            item = bc._items[slot]
+            self._cursor += 1
+            bc._release_slot(slot)
+            return True, item, True
+        if bc._closed:
+            return True, None, False
+        return False, None, False
+
+
+    def _leave_inner(self):
+        if self._closed:
+            return
+        self._closed = True
+        bc = self._bc
+        bc._subs.discard(self)
+        for seq in range(max(self._cursor, bc._tail), bc._head):
+            bc._release_slot(seq % bc._size)
+        self._cursor = bc._head
+        self._returned.clear()
+        # a waiting recv should see it
+        bc._wake_readers()
+
+
+    def _select_try(self) -> Tuple[bool, Any, bool]:
+        return self.recv_nowait()
+
+
+    def _select_register(self, group: _MutexGroup, id: int):
+        if group.done():
+            return
+        bc = self._bc
+        with bc._lock:
+            waiter = _MutexSubscriberReader(id, group, self)
+            if self._ready() and waiter.wake():
+                return
+            group.add_node(bc._readers.append(waiter), self) # type: ignore
+
+
+    def _release_node(self, node: LinkedNode):
+        with self._bc._lock:
+            node.delete()
+
+
+    _release_stale = _release_node
+
+
+    def _call_locked(self, func: Callable[..., Any], *args: Any) -> Any:
+        with self._bc._lock:
+            return func(*args)
+
+
+    def _requeue_inner(self, item: T):
+        if not self._closed:
+            self._returned.appendleft(item)
+            self._bc._wake_readers()
+
+
+    def __aiter__(self):
+        return self
+
+
+    async def __anext__(self) -> T:
+        item, ok = await self.recv()
+        if ok:
+            return item # type: ignore
+        else:
+            raise StopAsyncIteration
+
+
+
+class Broadcast(Generic[T]):
+    ''' a chan delivering every item to every subscriber
+
+    Items are stored once in a shared ring of buffsize slots, and each subscriber
+    reads them through its own cursor, so publishing doesn't copy per subscriber.
+    A slot is reused once every subscriber has read it. Subscribers only see items
+    published after they subscribed.
+    '''
+    def __init__(self, buffsize: int, slow: SlowPolicy = 'block'):
+        if buffsize <= 0:
+            raise ValueError('broadcast buffsize must be positive')
+        if slow not in ('block', 'drop', 'disconnect'):
+            raise ValueError(f'unknown slow subscriber policy {slow!r}')
+        self._size = buffsize
+        self._slow = slow
+        self._items: List[Any] = [None] * buffsize
+        # subscribers yet to read each slot
+        self._refs = [0] * buffsize
+        # sequence numbers of the next item to publish, and of the oldest one kept
+        self._head = 0
+        self._tail = 0
+        self._subs: set = set()
+        self._readers: LinkedList[Union[_BroadcastWaiter, _MutexSubscriberReader]] = LinkedList()
+        # publishers waiting for room, in order
+        self._writers: LinkedList[_BroadcastWaiter] = LinkedList()
+        self._closed = False
+        self._lock = Lock()
+
+
+    def subscribe(self) -> Subscriber[T]:
+        with self._lock:
+            sub = Subscriber(self)
+            if self._closed:
+                sub._closed = True
+            else:
+                self._subs.add(sub)
+            return sub
+
+
+    def subscribers(self) -> int:
+        return len(self._subs)
+
+
+    def close(self):
+        ''' subscribers still read what is buffered, and then get ok False
+        '''
+        with self._lock:
+            self._closed = True
+            while self._writers:
+                self._writers.popleft().wake()
+            self._wake_readers()
+
+
+    async def send(self, item: T):
+        with self._lock:
+            if not self._writers and self._send_inner(item):
+                return
+            waiter = _BroadcastWaiter()
+            waiter._node = self._writers.append(waiter)
+
+        try:
+            while True:
+                await waiter._future
+                with self._lock:
+                    if self._send_inner(item):
+                        waiter._node.delete()
+                        self._wake_writers()
+                        return
+                    waiter.rearm()
+        except asyncio.CancelledError:
+            with self._lock:
+                waiter._node.delete()
+                self._wake_writers()
+            raise
+
+
+    def send_nowait(self, item: T) -> bool:
+        with self._lock:
+            return not self._writers and self._send_inner(item)
+
+
+    def _send_inner(self, item: T) -> bool:
+        if self._closed:
+            raise ChanClosedError('broadcast closed')
+        if not self._subs:
+            # nobody to deliver to
+            return True
+        if self._head - self._tail == self._size:
+            if self._slow == 'block':
+                return False
+            elif self._slow == 'drop':
+                # laggards notice the gap on their next read
+                self._items[self._tail % self._size] = None
+                self._tail += 1
+            else:
+                for sub in [sub for sub in self._subs if sub._cursor == self._tail]:
+                    sub._disconnected = True
+                    sub._leave_inner()
+                if not self._subs:
+                    # all of them disconnected, a slot stored now would never be freed
+                    return True
+        slot = self._head % self._size
+        self._items[slot] = item
+        self._refs[slot] = len(self._subs)
+        self._head += 1
+        self._wake_readers()
+        return True
+
+
+    def _release_slot(self, slot: int):
+        refs = self._refs
+        refs[slot] -= 1
+        if refs[slot] > 0 or slot != self._tail % self._size:
+            return
+        # the oldest item is read by all, free it and whatever follows
+        size = self._size
+        while self._tail < self._head and refs[self._tail % size] == 0:
+            self._items[self._tail % size] = None
+            self._tail += 1
+        self._wake_writers()
+
+
+    def _wake_readers(self):
+        for node in self._readers.iternodes():
+            if node.val.wake():
+                node.delete()
+
+
+    def _wake_writers(self):
+        if self._writers and self._head - self._tail < self._size:
+            self._writers.left().val.wake()
+
+
+
+# signal
+
+class Signal(_SelectCase, Generic[T]):
+    ''' a one-shot event, far lighter than a chan
+
+    It holds at most one item, taken by a single reader, and can be sent again once
+    taken. Closing it wakes every reader, now and later, as a closed chan does.
+    Readers use it like a chan: recv it, iterate over it or select on it.
+    '''
+    __slots__ = ('_lock', '_readers', '_full', '_item', '_closed')
+
+    # for the chan methods shared below
+    _weighted = False
+
+    def __init__(self):
+        self._lock = Lock()
+        # allocated once a reader has to wait
+        self._readers: Optional[LinkedList[_ChanItemReader[T]]] = None
+        self._full = False
+        self._item: Optional[T] = None
+        self._closed = False
+
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            readers = self._readers
+            while readers:
+                reader = readers.popleft()
+                lock = reader.getlock()
+                if lock:
+                    lock.acquire()
+                try:
+                    if not reader.discarded():
+                        reader.close()
+                finally:
+                    if lock:
+                        lock.release()
+
+
+    def send_nowait(self, item: T) -> bool:
+        ''' hand item to a waiting reader or hold it, False if one is held already
+        '''
+        with self._lock:
+            return self._send_inner(item)
+
+
+    async def recv(self, timeout: Optional[float] = None, ctx: Optional[Context] = None) -> Tuple[Optional[T], bool]:
+        if ctx is not None and ctx.err() is not None:
+            raise ctx.err() # type: ignore
+        with self._lock:
+            received, item, ok = self._recv_inner()
+            if received:
+                return item, ok
+            reader = _SimpleChanItemReader(self) # type: ignore
+            reader._node = self._queue().append(reader)
+        if timeout is None and ctx is None:
+            return await reader.read()
+        return await self._wait_bounded(reader, reader.read(), timeout, ctx)
+
+
+    def recv_nowait(self) -> Tuple[bool, Optional[T], bool]:
+        with self._lock:
+            return self._recv_inner()
+
+
+    def case_recv(self) -> Signal[T]:
+        # selected on as it is, kept for code written against chans
+        return self
+
+
+    def __len__(self):
+        ''' 1 if an item is held
+        '''
+        return 1 if self._full else 0
+
+
+    def __bool__(self):
+        return True
+
+
+    def _queue(self) -> LinkedList[_ChanItemReader[T]]:
+        if self._readers is None:
+            self._readers = LinkedList()
+        return self._readers
+
+
+    def _send_inner(self, item: T) -> bool:
+        if self._closed:
+            raise ChanClosedError('chan closed')
+        if self._put_reader(item):
+            return True
+        if self._full:
+            return False
+        self._item = item
+        self._full = True
+        return True
+
+
+    def _put_reader(self, item: T) -> bool:
+        readers = self._readers
+        while readers:
+            reader = readers.popleft()
+            if reader.discarded():
+                continue
+            lock = reader.getlock()
+            if lock:
+                lock.acquire()
+            try:
+                if not reader.discarded():
+                    reader.put(item, True)
+                    return True
+            finally:
+                if lock:
+                    lock.release()
+        return False
+
+
+    def _recv_inner(self) -> Tuple[bool, Optional[T], bool]:
+        if self._full:
+            item = self._item
+            self._item = None
+            self._full = False
+            return True, item, True
+        if self._closed:
+            return True, None, False
+        return False, None, False
+
+
+    def _recv_or_register(self, reader: _ChanItemReader[T]) -> Tuple[bool, Optional[T], bool, Optional[LinkedNode]]:
+        with self._lock:
+            received, item, ok = self._recv_inner()
+            if received:
+                return True, item, ok, None
+            return False, None, False, self._queue().append(reader)
+
+
+    def _select_try(self) -> Tuple[bool, Any, bool]:
+        return self.recv_nowait()
+
+
+    def _select_register(self, group: _MutexGroup, id: int):
+        if group.done():
+            return
+        with self._lock:
+            with group.getlock():
+                if group.done():
+                    return
+                received, item, ok = self._recv_inner()
+                if received:
+                    group.set_result(id, item, ok, self if ok else None) # type: ignore
+                    return
+            reader = _MutexChanItemReader(id, group, self) # type: ignore
+            group.add_node(self._queue().append(reader), self) # type: ignore
+
+
+    def _release_node(self, node: LinkedNode):
+        with self._lock:
+            node.delete()
+
+
+    _release_stale = _release_node
+
+
+    def _call_locked(self, func: Callable[..., Any], *args: Any) -> Any:
+        with self._lock:
+            return func(*args)
+
+
+    def _requeue_inner(self, item: T):
+        # an item taken by a reader who then gave up, superseded by one held since
+        if self._put_reader(item) or self._full:
+            return
+        self._item = item
+        self._full = True
+
+
+    _wait_bounded = Chan._wait_bounded
+    _expire = Chan._expire
+    _expire_inner = Chan._expire_inner
+    _abandon_reader_inner = Chan._abandon_reader_inner
+
+
+    def __aiter__(self):
+        return self
+
+
+    async def __anext__(self) -> T:
+        item, ok = await self.recv()
+        if ok:
+            return item # type: ignore
+        else:
+            raise StopAsyncIteration
@@ -3,8 +3,8 @@ from __future__ import annotations
 import threading
 from abc import ABC, abstractmethod
 import time
-from typing import Any, Callable, Optional, Set, Tuple
-from .channel import Chan, nilchan, select
+from typing import Any, Callable, Optional, Set, Tuple, Union
+from .channel import Chan, Signal, nilchan, select
 from .executor import go
 from .time import AfterFunc, Timer
 
@@ -15,7 +15,7 @@ class Context(ABC):
         pass
     
     @abstractmethod
-    def done(self) -> Chan[None]:
+    def done(self) -> Union[Chan[None], Signal[None]]:
         pass
     
     @abstractmethod
@@ -83,7 +83,7 @@ class _Canceler(ABC):
         pass
 
     @abstractmethod
-    def done(self) -> Chan[None]:
+    def done(self) -> Signal[None]:
         pass
 
 
@@ -124,7 +124,7 @@ class _CancelCtx(Context, _Canceler):
     def __init__(self, context: Context):
         self._context = context
         self._lock = threading.Lock()
-        self._done: Optional[Chan[None]] = None
+        self._done: Optional[Signal[None]] = None
         self._children: Set[_Canceler] = set()
         self._err: Optional[Exception] = None
         
@@ -133,12 +133,12 @@ class _CancelCtx(Context, _Canceler):
         return self._context.deadline()
     
 
-    def done(self) -> Chan[None]:
+    def done(self) -> Signal[None]:
         if self._done is not None:
             return self._done
         with self._lock:
             if self._done is None:
-                self._done = Chan[None]()
+                self._done = Signal()
             return self._done
     
 
@@ -162,7 +162,7 @@ class _CancelCtx(Context, _Canceler):
             
             self._err = err
             if self._done is None:
-                self._done = _closed_chan
+                self._done = _closed_signal
             else:
                 self._done.close()
             
@@ -178,7 +178,7 @@ class _CancelCtx(Context, _Canceler):
 
 def _parent_cancel_ctx(parent: Context) -> Tuple[Optional[_CancelCtx], bool]:
     done = parent.done()
-    if done == _closed_chan or done == nilchan:
+    if done == _closed_signal or done == nilchan:
         return None, False
     
     p = parent.value(_cancel_ctx_key)
@@ -203,9 +203,9 @@ def _remove_child(parent: Context, child: _Canceler):
             p._children.remove(child)
     
 
-# closedchan is a reusable closed channel.
-_closed_chan = Chan[None]()
-_closed_chan.close()
+# closedsignal is a reusable closed signal.
+_closed_signal: Signal[None] = Signal()
+_closed_signal.close()
 
 
 def WithDeadline(parent: Context, d: float) -> Tuple[Context, CancelFunc]:
@@ -246,7 +246,7 @@ class _TimerCtx(Context, _Canceler):
     def deadline(self) -> Optional[float]:
         return self._deadline
     
-    def done(self) -> Chan[None]:
+    def done(self) -> Signal[None]:
         return self._cancel_ctx.done()
     
     def err(self) -> Optional[Exception]:
@@ -286,7 +286,7 @@ class _ValueCtx(Context):
     def deadline(self) -> Optional[float]:
         return self._context.deadline()
     
-    def done(self) -> Chan[None]:
+    def done(self) -> Union[Chan[None], Signal[None]]:
         return self._context.done()
     
     def err(self) -> Optional[Exception]:
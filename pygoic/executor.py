@@ -1,31 +1,277 @@
-
 from __future__ import annotations
 import asyncio
+import inspect
+import sys
 import threading
 from asyncio import AbstractEventLoop, Future as AsyncFuture
-from concurrent.futures import Future as ConcurrentFuture, ThreadPoolExecutor
-from typing import Any, Awaitable, Callable, Optional, TypeVar
+from collections import deque
+from concurrent.futures import Future as ConcurrentFuture, ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import count
+import multiprocessing
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Awaitable, Callable, Deque, Dict, Generator, Generic, Iterable, List, Literal, Optional, Tuple, TypeVar, Union
 
 
 T = TypeVar('T')
 
 
+# where go() puts a goroutine without a key, when running several loops
+Placement = Literal['round_robin', 'hash', 'least_loaded']
+
+
+class _Goroutine(Generic[T]):
+    ''' a goroutine placed on another loop, can be awaited from any loop, any number of times
+    '''
+    __slots__ = ('_future',)
+
+    def __init__(self, future: ConcurrentFuture):
+        self._future = future
+
+    def __await__(self) -> Generator[Any, None, T]:
+        return asyncio.wrap_future(self._future).__await__()
+
+    def done(self) -> bool:
+        return self._future.done()
+
+    def cancelled(self) -> bool:
+        return self._future.cancelled()
+
+    def cancel(self) -> bool:
+        return self._future.cancel()
+
+
+async def _await(aw: Awaitable[T]) -> T:
+    return await aw
+
+
+# 3.12 can run a task's first step as it is created, before that eager start is
+# a plain one, as no other way keeps current_task() right during the first step
+_EAGER_START = sys.version_info >= (3, 12)
+
+
+def _start_eager(coro: Awaitable[T], loop: AbstractEventLoop) -> Awaitable[T]:
+    ''' run the first step of coro now, on the running loop, rather than on its next round
+    '''
+    if _EAGER_START and asyncio.iscoroutine(coro):
+        return asyncio.Task(coro, loop=loop, eager_start=True) # type: ignore
+    return asyncio.ensure_future(coro)
+
+
+def _check_awaitable(coro: Any):
+    # found out here rather than on the loop, as ensure_future would
+    if not inspect.isawaitable(coro):
+        raise TypeError('An asyncio.Future, a coroutine or an awaitable is required')
+
+
+# results of delegate_process(shared=True) smaller than this are pickled as usual
+_SHARED_MIN = 1 << 19
+
+
+class _SharedResult:
+    ''' a bytes or numpy result left by a worker process in a shared memory block
+    '''
+    __slots__ = ('name', 'size', 'kind', 'dtype', 'shape')
+
+    def __init__(self, name: str, size: int, kind: str, dtype: Optional[str] = None, shape: Optional[Tuple[int, ...]] = None):
+        self.name = name
+        self.size = size
+        self.kind = kind
+        self.dtype = dtype
+        self.shape = shape
+
+
+def _call_shared(func: Callable[..., Any], *args: Any) -> Any:
+    # runs in the worker process
+    result = func(*args)
+    numpy = sys.modules.get('numpy')
+    if numpy is not None and isinstance(result, numpy.ndarray):
+        if result.nbytes < _SHARED_MIN or result.dtype.hasobject:
+            return result
+        shared = _SharedResult('', result.nbytes, 'ndarray', result.dtype.str, result.shape)
+        data = memoryview(numpy.ascontiguousarray(result)).cast('B')
+    elif isinstance(result, (bytes, bytearray, memoryview)):
+        data = memoryview(result).cast('B')
+        if data.nbytes < _SHARED_MIN:
+            return result
+        shared = _SharedResult('', data.nbytes, type(result).__name__)
+    else:
+        return result
+    shm = SharedMemory(create=True, size=shared.size)
+    try:
+        shm.buf[:shared.size] = data
+        shared.name = shm.name
+    except BaseException:
+        shm.close()
+        shm.unlink()
+        raise
+    shm.close()
+    return shared
+
+
+def _take_shared(result: Any) -> Any:
+    # copies a shared result out and frees its block, in the calling process
+    if not isinstance(result, _SharedResult):
+        return result
+    shm = SharedMemory(name=result.name)
+    try:
+        data = shm.buf[:result.size]
+        try:
+            if result.kind == 'ndarray':
+                import numpy
+                return numpy.frombuffer(data, numpy.dtype(result.dtype)).reshape(result.shape).copy() # type: ignore
+            if result.kind == 'bytearray':
+                return bytearray(data)
+            if result.kind == 'memoryview':
+                return memoryview(bytes(data))
+            return bytes(data)
+        finally:
+            data.release()
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def _drop_shared(future: ConcurrentFuture):
+    if not future.cancelled() and future.exception() is None:
+        _take_shared(future.result())
+
+
+class _Spawner:
+    ''' starts goroutines on one loop from other threads, waking it once per burst
+    '''
+    __slots__ = ('_loop', '_pending', '_scheduled')
+
+    def __init__(self, loop: AbstractEventLoop):
+        self._loop = loop
+        self._pending: Deque[Tuple[Awaitable[Any], Union[AsyncFuture, ConcurrentFuture]]] = deque()
+        self._scheduled = False
+
+    def start(self, coro: Awaitable[T]) -> AsyncFuture:
+        # the task is queued on the loop right away, only the wakeup is shared
+        task = asyncio.ensure_future(coro, loop=self._loop)
+        self._wake()
+        return task
+
+    def start_many(self, coros: Iterable[Awaitable[T]]) -> List[AsyncFuture]:
+        tasks = [asyncio.ensure_future(coro, loop=self._loop) for coro in coros]
+        self._wake()
+        return tasks
+
+    def submit(self, coro: Awaitable[Any], future: Union[AsyncFuture, ConcurrentFuture]):
+        _check_awaitable(coro)
+        self._pending.append((coro, future))
+        self._wake()
+
+    def submit_many(self, batch: List[Tuple[Awaitable[Any], Union[AsyncFuture, ConcurrentFuture]]]):
+        for coro, _ in batch:
+            _check_awaitable(coro)
+        self._pending.extend(batch)
+        self._wake()
+
+    def _wake(self):
+        if not self._scheduled:
+            self._scheduled = True
+            self._loop.call_soon_threadsafe(self._run)
+
+    def _run(self):
+        # cleared first, so whatever was submitted by anyone seeing it set gets drained
+        self._scheduled = False
+        pending = self._pending
+        while pending:
+            coro, future = pending.popleft()
+            if future.cancelled():
+                if asyncio.iscoroutine(coro):
+                    coro.close()
+                continue
+            asyncio.futures._chain_future(asyncio.ensure_future(coro), future) # type: ignore
+
+
 class GoroutineExecutor:
-    def __init__(self):
+    def __init__(self, loops: int = 1, placement: Placement = 'round_robin', eager: bool = False):
         self._lock = threading.Lock()
-        self._loop = asyncio.new_event_loop()
-        self._worker: Optional[threading.Thread] = None
+        # default for go() on a loop, run the first step before returning
+        self._eager = eager
+        self._workers: List[threading.Thread] = []
         self._pool: Optional[ThreadPoolExecutor] = None
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        self._process_config: Dict[str, Any] = {}
+        self._shard(loops, placement)
+
+
+    def _shard(self, loops: int, placement: Placement):
+        if loops <= 0:
+            raise ValueError('an executor needs at least one loop')
+        if placement not in ('round_robin', 'hash', 'least_loaded'):
+            raise ValueError(f'unknown goroutine placement {placement!r}')
+        self._placement = placement
+        self._loops = [asyncio.new_event_loop() for _ in range(loops)]
+        # do() and callers outside any loop use the first one
+        self._loop = self._loops[0]
+        self._index: Dict[AbstractEventLoop, int] = {loop: i for i, loop in enumerate(self._loops)}
+        self._spawners = [_Spawner(loop) for loop in self._loops]
+        self._next = count()
+        # live goroutines per loop, kept for least_loaded only
+        self._load = [0] * loops
+        self._load_lock = threading.Lock()
+
+
+    def set_loops(self, loops: int, placement: Placement = 'round_robin'):
+        ''' run goroutines on this many loops, each on its own thread, before any is started
+        '''
+        with self._lock:
+            if self._workers:
+                raise RuntimeError('executor already started')
+            for loop in self._loops:
+                loop.close()
+            self._shard(loops, placement)
+
+
+    def set_eager(self, eager: bool):
+        ''' whether go() on a loop starts goroutines eagerly, unless told otherwise per call
+
+        Eager start needs 3.12 or later, before that it is a plain start.
+        '''
+        self._eager = eager
+
+
+    def set_process_pool(
+        self,
+        max_workers: Optional[int] = None,
+        start_method: Optional[str] = None,
+        initializer: Optional[Callable[..., Any]] = None,
+        initargs: Tuple[Any, ...] = (),
+    ):
+        ''' configure the pool delegate_process() runs on, before it is first used
+
+        With no start method, it is forkserver where available, as forking a process
+        with loops running on other threads is unsafe.
+        '''
+        if start_method is not None and start_method not in multiprocessing.get_all_start_methods():
+            raise ValueError(f'unknown start method {start_method!r}')
+        with self._lock:
+            if self._process_pool:
+                raise RuntimeError('process pool already started')
+            self._process_config = dict(
+                max_workers=max_workers,
+                start_method=start_method,
+                initializer=initializer,
+                initargs=initargs,
+            )
+
 
-    
     def _init_worker(self):
-        if self._worker:
+        if self._workers:
             return
         with self._lock:
-            if self._worker:
+            if self._workers:
                 return
-            self._worker = threading.Thread(target=self._worker_run, daemon=True)
-            self._worker.start()
+            workers = [
+                threading.Thread(target=self._worker_run, args=(loop,), daemon=True)
+                for loop in self._loops
+            ]
+            for worker in workers:
+                worker.start()
+            self._workers = workers
 
 
     def _init_pool(self):
@@ -36,10 +282,23 @@ class GoroutineExecutor:
                 return
             self._pool = ThreadPoolExecutor()
 
-    
-    def _worker_run(self):
-        asyncio.set_event_loop(self._loop)
-        self._loop.run_forever()
+
+    def _init_process_pool(self):
+        if self._process_pool:
+            return
+        with self._lock:
+            if self._process_pool:
+                return
+            config = dict(self._process_config)
+            start_method = config.pop('start_method', None)
+            if start_method is None and 'forkserver' in multiprocessing.get_all_start_methods():
+                start_method = 'forkserver'
+            self._process_pool = ProcessPoolExecutor(mp_context=multiprocessing.get_context(start_method), **config)
+
+
+    def _worker_run(self, loop: AbstractEventLoop):
+        asyncio.set_event_loop(loop)
+        loop.run_forever()
 
 
     def _get_event_loop(self) -> AbstractEventLoop:
@@ -64,44 +323,182 @@ class GoroutineExecutor:
 
     def __del__(self):
         self.close()
-    
-    
+
+
     def close(self):
         with self._lock:
-            if self._worker and self._worker.is_alive():
-                self._loop.call_soon_threadsafe(self._loop.stop)
+            for loop, worker in zip(self._loops, self._workers):
+                if worker.is_alive():
+                    loop.call_soon_threadsafe(loop.stop)
             if self._pool:
                 self._pool.shutdown(wait=False)
-    
-    
-    def go(self, coro: Awaitable[T]) -> Awaitable[T]:
-        loop = self._get_event_loop()
-        future = asyncio.ensure_future(coro, loop=loop)
-        loop.call_soon_threadsafe(lambda: None)
+            if self._process_pool:
+                # 3.8 closes the call queue before its workers are stopped, leaving
+                # the interpreter hanging at exit, unless it waits for them
+                self._process_pool.shutdown(wait=sys.version_info < (3, 9))
+
+
+    def go(self, coro: Awaitable[T], key: Any = None, eager: Optional[bool] = None) -> Awaitable[T]:
+        ''' start coro as a goroutine, goroutines with equal keys share a loop
+
+        On 3.12 and later, an eager goroutine started on its own loop runs up to its
+        first suspension before go() returns, and one finishing by then comes back done.
+        Before 3.12 eager is ignored and the goroutine starts on the loop's next round.
+        '''
+        running = asyncio._get_running_loop()
+        if running is not None and (len(self._loops) == 1 or running not in self._index):
+            # stays on the caller's loop, nothing to wake up
+            return self._start_here(coro, running, eager)
+        self._init_worker()
+        if len(self._loops) == 1:
+            return self._spawners[0].start(coro)
+        if asyncio.isfuture(coro):
+            # already running on its own loop
+            loop = coro.get_loop() # type: ignore
+            if running is None or loop is running:
+                return coro
+            return _Goroutine(asyncio.run_coroutine_threadsafe(_await(coro), loop))
+
+        i = self._place(coro, key)
+        if self._loops[i] is running:
+            future = self._start_here(coro, running, eager)
+            self._track(i, future)
+            return future
+        remote = self._remote_future(i)
+        self._spawners[i].submit(coro, remote)
+        return _Goroutine(remote)
+
+
+    def go_many(self, coros: Iterable[Awaitable[T]]) -> List[Awaitable[T]]:
+        ''' start a batch of goroutines, waking each loop at most once
+        '''
+        running = asyncio._get_running_loop()
+        if running is not None and (len(self._loops) == 1 or running not in self._index):
+            return [self._start_here(coro, running, None) for coro in coros]
+        self._init_worker()
+        if len(self._loops) == 1:
+            return self._spawners[0].start_many(coros)
+        futures: List[Awaitable[T]] = []
+        batches: Dict[int, List[Tuple[Awaitable[Any], Union[AsyncFuture, ConcurrentFuture]]]] = {}
+        for coro in coros:
+            if asyncio.isfuture(coro):
+                futures.append(self.go(coro))
+                continue
+            i = self._place(coro, None)
+            if self._loops[i] is running:
+                future = self._start_here(coro, running, None)
+                self._track(i, future)
+                futures.append(future)
+                continue
+            remote = self._remote_future(i)
+            batches.setdefault(i, []).append((coro, remote))
+            futures.append(_Goroutine(remote))
+        for i, batch in batches.items():
+            self._spawners[i].submit_many(batch)
+        return futures
+
+
+    def _start_here(self, coro: Awaitable[T], loop: AbstractEventLoop, eager: Optional[bool]) -> Awaitable[T]:
+        if self._eager if eager is None else eager:
+            return _start_eager(coro, loop)
+        return asyncio.ensure_future(coro)
+
+
+    def _remote_future(self, i: int) -> ConcurrentFuture:
+        future: ConcurrentFuture = ConcurrentFuture()
+        self._track(i, future)
         return future
 
-    
+
+    def _place(self, coro: Awaitable[Any], key: Any) -> int:
+        n = len(self._loops)
+        if key is not None:
+            return hash(key) % n
+        if self._placement == 'round_robin':
+            return next(self._next) % n
+        if self._placement == 'hash':
+            # by the coroutine function, so that its goroutines run together
+            return hash(getattr(coro, '__qualname__', None)) % n
+        load = self._load
+        return load.index(min(load))
+
+
+    def _track(self, i: int, future: Any):
+        if self._placement != 'least_loaded':
+            return
+        with self._load_lock:
+            self._load[i] += 1
+        future.add_done_callback(lambda _: self._unload(i))
+
+
+    def _unload(self, i: int):
+        with self._load_lock:
+            self._load[i] -= 1
+
+
     def do(self, coro: Awaitable[T]) -> T:
         if asyncio._get_running_loop() is not None:
             raise RuntimeError(f"Not allow to call `do` inside a event loop.")
         else:
             self._init_worker()
-            
-        afut = asyncio.ensure_future(coro, loop=self._loop)
+
         cfut = ConcurrentFuture()
-        self._loop.call_soon_threadsafe(self._future_callback, afut, cfut)
+        if len(self._loops) > 1 and not asyncio.isfuture(coro):
+            # queued behind the goroutines this thread started before
+            self._spawners[0].submit(coro, cfut)
+            return cfut.result()
+        # a goroutine already started stays on its loop
+        loop = coro.get_loop() if asyncio.isfuture(coro) else self._loop # type: ignore
+        afut = asyncio.ensure_future(coro, loop=loop)
+        loop.call_soon_threadsafe(self._future_callback, afut, cfut)
         return cfut.result()
 
 
+    def do_many(self, coros: Iterable[Awaitable[T]]) -> List[T]:
+        ''' run a batch of goroutines to completion, crossing into the loop once
+        '''
+        return self.do(self._gather(list(coros)))
+
+
+    async def _gather(self, coros: List[Awaitable[T]]) -> List[T]:
+        # spawned from inside the loop, so each one still goes by placement
+        return list(await asyncio.gather(*self.go_many(coros)))
+
+
     async def delegate(self, func: Callable[..., T], *args: Any) -> T:
         self._init_pool()
-        return await self._loop.run_in_executor(self._pool, func, *args)
+        return await asyncio.get_running_loop().run_in_executor(self._pool, func, *args)
+
+
+    async def delegate_process(self, func: Callable[..., T], *args: Any, shared: bool = False) -> T:
+        ''' like delegate, in a worker process, so func and args must be picklable
+
+        A shared one sends a large bytes, bytearray or numpy result back through
+        shared memory rather than pickling it over the pool's pipe.
+        '''
+        self._init_process_pool()
+        loop = asyncio.get_running_loop()
+        if not shared:
+            return await loop.run_in_executor(self._process_pool, func, *args)
+        future = self._process_pool.submit(_call_shared, func, *args) # type: ignore
+        try:
+            result = await asyncio.wrap_future(future, loop=loop)
+        except asyncio.CancelledError:
+            # nobody takes the block then, free it once the call is done
+            future.add_done_callback(_drop_shared)
+            raise
+        return _take_shared(result)
 
 
 
 _executor = GoroutineExecutor()
 _get_event_loop = _executor._get_event_loop
 go = _executor.go
+go_many = _executor.go_many
 do = _executor.do
+do_many = _executor.do_many
 delegate = _executor.delegate
-
+delegate_process = _executor.delegate_process
+set_process_pool = _executor.set_process_pool
+set_loops = _executor.set_loops
+set_eager = _executor.set_eager
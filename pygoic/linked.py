@@ -7,6 +7,8 @@ T = TypeVar('T')
 
 
 class LinkedNode(Generic[T]):
+    __slots__ = ('list', 'val', 'next', 'prev')
+
     def __init__(self, list: LinkedList[T], val: T, next: LinkedNode[T], prev: LinkedNode[T]):
         self.list: LinkedList[T] = list
         self.val: T = val
@@ -25,6 +27,8 @@ class LinkedNode(Generic[T]):
 
 
 class LinkedList(Generic[T]):
+    __slots__ = ('_count', '_head', '_tail')
+
     def __init__(self):
         self._count: int = 0
         self._head: LinkedNode[T] = LinkedNode(self, None, None, None)  # type: ignore
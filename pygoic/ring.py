@@ -0,0 +1,195 @@
+from __future__ import annotations
+from array import array
+from typing import Any, Generic, Optional, TypeVar
+
+
+T = TypeVar('T')
+
+
+# native struct format chars by kind, those of a kind differing only in size
+_KINDS = {
+    **dict.fromkeys('bhilqn', 'i'),
+    **dict.fromkeys('BHILQN', 'u'),
+    **dict.fromkeys('efd', 'f'),
+    '?': 'b',
+}
+
+
+def _kind(format: str) -> Optional[str]:
+    return _KINDS.get(format[1:] if format[:1] == '@' else format)
+
+
+class RingBuffer(Generic[T]):
+    ''' fixed-capacity FIFO over a preallocated sequence, growing only if overfilled
+    '''
+    __slots__ = ('_storage', '_capacity', '_head', '_count')
+
+    def __init__(self, capacity: int):
+        if capacity <= 0:
+            raise ValueError('ring buffer capacity must be positive')
+        self._storage = self._alloc(capacity)
+        self._capacity = capacity
+        self._head = 0
+        self._count = 0
+
+
+    def _alloc(self, capacity: int) -> Any:
+        return [None] * capacity
+
+
+    def _get(self, i: int) -> T:
+        return self._storage[i]
+
+
+    def _clear(self, i: int):
+        # drop the reference, for object storage
+        self._storage[i] = None
+
+
+    def capacity(self) -> int:
+        return self._capacity
+
+
+    def append(self, x: T):
+        if self._count == self._capacity:
+            self._grow()
+        self._storage[(self._head + self._count) % self._capacity] = x
+        self._count += 1
+
+
+    def appendleft(self, x: T):
+        if self._count == self._capacity:
+            self._grow()
+        self._head = (self._head - 1) % self._capacity
+        self._storage[self._head] = x
+        self._count += 1
+
+
+    def popleft(self) -> T:
+        if self._count == 0:
+            raise IndexError('pop from an empty RingBuffer')
+        head = self._head
+        x = self._get(head)
+        self._clear(head)
+        self._head = (head + 1) % self._capacity
+        self._count -= 1
+        return x
+
+
+    def _grow(self):
+        capacity = self._capacity * 2
+        storage = self._alloc(capacity)
+        for i in range(self._count):
+            storage[i] = self._storage[(self._head + i) % self._capacity]
+        self._storage = storage
+        self._capacity = capacity
+        self._head = 0
+
+
+    def __len__(self):
+        return self._count
+
+
+    def __bool__(self):
+        return self._count > 0
+
+
+
+class TypedRingBuffer(RingBuffer[T]):
+    ''' ring buffer over storage supporting the buffer protocol
+    '''
+    __slots__ = ('_scratch',)
+
+    def __init__(self, capacity: int):
+        super().__init__(capacity)
+        # one slot to try items in
+        self._scratch = self._alloc(1)
+
+
+    def _clear(self, i: int):
+        pass
+
+
+    def coerce(self, x: Any) -> T:
+        ''' x as it would be stored, raising as storing it would
+        '''
+        scratch = self._scratch
+        scratch[0] = x
+        return scratch[0]
+
+
+    def format(self) -> str:
+        return memoryview(self._storage).format
+
+
+    def fits(self, out: memoryview) -> bool:
+        ''' whether out holds items of the same kind and size, as 'l' and 'q' may
+        '''
+        storage = memoryview(self._storage)
+        if out.format == storage.format:
+            return True
+        kind = _kind(out.format)
+        return kind is not None and kind == _kind(storage.format) and out.itemsize == storage.itemsize
+
+
+    def popleft_into(self, out: memoryview, n: int) -> int:
+        ''' move up to n items into out, as at most two slice copies
+        '''
+        n = min(n, self._count, len(out))
+        if n == 0:
+            return 0
+        storage = memoryview(self._storage)
+        if storage.format != out.format:
+            storage = storage.cast('B').cast(out.format)
+        first = min(n, self._capacity - self._head)
+        out[:first] = storage[self._head:self._head + first]
+        if n > first:
+            out[first:n] = storage[:n - first]
+        self._head = (self._head + n) % self._capacity
+        self._count -= n
+        return n
+
+
+
+class ArrayRingBuffer(TypedRingBuffer[T]):
+    ''' ring buffer storing numbers unboxed in an array.array
+    '''
+    __slots__ = ('_typecode',)
+
+    def __init__(self, typecode: str, capacity: int):
+        self._typecode = typecode
+        super().__init__(capacity)
+
+
+    def _alloc(self, capacity: int) -> Any:
+        return array(self._typecode, bytes(array(self._typecode).itemsize * capacity))
+
+
+
+class NumpyRingBuffer(TypedRingBuffer[T]):
+    ''' ring buffer storing numbers unboxed in a numpy array
+    '''
+    __slots__ = ('_numpy', '_dtype')
+
+    def __init__(self, dtype: Any, capacity: int):
+        try:
+            import numpy
+        except ImportError:
+            raise ImportError('numpy is required for a chan with dtype') from None
+        self._numpy = numpy
+        self._dtype = numpy.dtype(dtype)
+        super().__init__(capacity)
+
+
+    def _alloc(self, capacity: int) -> Any:
+        return self._numpy.zeros(capacity, self._dtype)
+
+
+    def _get(self, i: int) -> T:
+        return self._storage.item(i)
+
+
+    def coerce(self, x: Any) -> T:
+        scratch = self._scratch
+        scratch[0] = x
+        return scratch.item(0)
@@ -4,7 +4,7 @@ import threading
 import time
 from typing import Any, Awaitable, Callable, Generic, Optional, TypeVar
 
-from .channel import Chan
+from .channel import Signal
 from .executor import _get_event_loop, go
 
 
@@ -24,7 +24,7 @@ class _Value(Generic[T]):
 
 class Timer:
     def __init__(self, duration: float, func: Optional[Callable[[], Any]] = None):
-        self.C = Chan[float](1)
+        self.C: Signal[float] = Signal()
         self._active: _Value[bool] = _Value(True)
         self._lock = threading.Lock()
         self._func: Callable[[], Any]
@@ -91,7 +91,7 @@ def AfterFunc(duration: float, func: Callable[[], Awaitable[Any]]) -> Timer:
 
 
 
-def After(duration: float) -> Chan[float]:
+def After(duration: float) -> Signal[float]:
 	return Timer(duration).C
 
 
@@ -1,9 +1,14 @@
 
 import asyncio
-from typing import List
+from array import array
+import threading
+import time
+import tracemalloc
+from typing import Callable, List
 from pygoic import go, do
-from pygoic import Chan, nilchan, select, After
-from pygoic import ChanClosedError
+from pygoic import Chan, PriorityChan, Pipe, Broadcast, Signal, nilchan, select, Selector, SelectSet, After
+from pygoic import ChanClosedError, ChanTimeoutError
+from pygoic import Background, Canceled, DeadlineExceeded, WithCancel, WithTimeout
 
 
 def test_chan_send_with_buff():
@@ -343,3 +348,1319 @@ def test_nilchan():
     else:
         assert False
 
+
+def test_chan_send_recv_many():
+    ch = Chan[int](3)
+    done = Chan()
+    L = []
+
+    async def f1():
+        # 3 fit into the buffer, the rest waits
+        await ch.send_many(range(8))
+        L.append('f1_0')
+        ch.close()
+
+    async def f2():
+        await asyncio.sleep(0.001)
+        while True:
+            items, ok = await ch.recv_many(5)
+            if not ok:
+                break
+            assert 0 < len(items) <= 5
+            L.extend(items)
+        done.close()
+
+    go(f1())
+    go(f2())
+    do(done.recv())
+    assert L.index('f1_0') > 3
+    L.remove('f1_0')
+    assert L == list(range(8))
+
+
+def test_chan_send_recv_many_nowait():
+    ch = Chan[int](2)
+    assert ch.recv_many_nowait(3) == ([], True)
+    assert ch.send_many_nowait([1, 2, 3]) == 2
+    assert ch.recv_many_nowait(3) == ([1, 2], True)
+
+    ch.send_nowait(4)
+    ch.close()
+    assert ch.recv_many_nowait(3) == ([4], True)
+    assert ch.recv_many_nowait(3) == ([], False)
+    try:
+        ch.send_many_nowait([5])
+    except ChanClosedError:
+        pass
+    else:
+        assert False
+
+
+def test_chan_send_many_closed():
+    ch = Chan[int]()
+
+    async def f1():
+        try:
+            await ch.send_many([1, 2, 3])
+        except ChanClosedError:
+            return 'closed'
+
+    async def f2():
+        x = go(f1())
+        item, ok = await ch.recv()
+        assert item == 1 and ok
+        ch.close()
+        return await x
+
+    assert do(f2()) == 'closed'
+
+
+def test_chan_loop_affine():
+    ch1 = Chan[int](loop_affine=True)
+    ch2 = Chan[int](1, loop_affine=True)
+
+    async def f1():
+        go(ch1.send(1))
+        x, ok = await ch1.recv()
+        assert x == 1 and ok
+        go(ch1.send(2))
+        id, x, ok = await select(ch2, ch1)
+        assert id == 1 and x == 2
+        ch2.send_nowait(3)
+        id, x, ok = await select(ch1, ch2)
+        assert id == 1 and x == 3
+
+    do(f1())
+    # bound to the executor loop thread
+    try:
+        ch2.send_nowait(4)
+    except RuntimeError:
+        pass
+    else:
+        assert False
+
+
+def test_chan_loop_affine_default():
+    from pygoic import set_default_loop_affine
+    set_default_loop_affine(True)
+    try:
+        ch = Chan[int](1)
+    finally:
+        set_default_loop_affine(False)
+    assert ch.send_nowait(1)
+    assert Chan[int](1).send_nowait(1)
+
+    async def f1():
+        return ch.recv_nowait()
+
+    try:
+        do(f1())
+    except RuntimeError:
+        pass
+    else:
+        assert False
+
+
+def test_chan_cross_thread_wakeup():
+    ch = Chan[str]()
+    L = []
+
+    async def f1():
+        x, ok = await ch.recv()
+        L.append(x)
+
+    go(f1())
+    time.sleep(0.01)
+    # send from a plain thread, nothing else is going to wake up the loop
+    assert ch.send_nowait('m_0')
+    time.sleep(0.05)
+    assert L == ['m_0']
+
+
+def test_select_ready_fast_path():
+    ch0 = Chan[str]()
+    ch1 = Chan[str](1)
+    ch2 = Chan[str]()
+    ch2.close()
+
+    async def f1():
+        ch1.send_nowait('1')
+        id, x, ok = await select(ch0, ch2.case_send('2'), ch1)
+        assert id == 2 and x == '1' and ok
+        # nothing was left waiting on the other chans
+        assert not ch0.send_nowait('x') and ch0.recv_nowait() == (False, None, False)
+        try:
+            await select(ch0, ch2.case_send('2'))
+        except ChanClosedError:
+            pass
+        else:
+            assert False
+
+    do(f1())
+
+
+def test_selector_reuse():
+    jobs = Chan[int]()
+    results = Chan[int]()
+    quit = Chan[None]()
+    L = []
+
+    async def producer():
+        for i in range(20):
+            await jobs.send(i)
+            await asyncio.sleep(0)
+        quit.close()
+
+    async def consumer():
+        async for x in results:
+            L.append(x)
+
+    async def worker():
+        idle = Selector(quit, jobs)
+        sel = Selector(quit, jobs, results.case_send(None))
+        pending = []
+        while True:
+            if pending:
+                sel.set_item(2, pending[0])
+                id, x, ok = await sel.select()
+            else:
+                id, x, ok = await idle.select()
+            if id == 0:
+                break
+            elif id == 1:
+                pending.append(x * 10)
+            else:
+                pending.pop(0)
+        for x in pending:
+            await results.send(x)
+        # no waiter left behind to take a job
+        assert not jobs.send_nowait(-1)
+        results.close()
+
+    go(producer())
+    x = go(consumer())
+    do(worker())
+    do(x)
+    assert L == [i * 10 for i in range(20)]
+
+
+def test_selector_default_and_errors():
+    ch1 = Chan[int](1)
+    ch2 = Chan[int]()
+    sel = Selector(ch1.case_recv(), ch2.case_send(0))
+
+    async def f1():
+        assert await sel.select(default=True) == (-1, None, False)
+        ch1.send_nowait(1)
+        assert await sel.select() == (0, 1, True)
+        go(ch2.recv())
+        sel.set_item(1, 2)
+        assert await sel.select() == (1, 2, True)
+        ch2.close()
+        try:
+            await sel.select()
+        except ChanClosedError:
+            pass
+        else:
+            assert False
+
+    do(f1())
+    try:
+        sel.set_item(0, 1)
+    except ValueError:
+        pass
+    else:
+        assert False
+
+
+def test_select_set_fan_in():
+    chans = [Chan[int]() for _ in range(100)]
+    sset = SelectSet()
+    for i, ch in enumerate(chans):
+        sset.add(i, ch)
+
+    async def producer(i: int):
+        await chans[i].send(i)
+        await chans[i].send(i + 1000)
+        chans[i].close()
+
+    async def consumer():
+        received = []
+        closed = []
+        while len(sset) > 0:
+            key, x, ok = await sset.select()
+            if ok:
+                received.append((key, x))
+            else:
+                closed.append(key)
+        return received, closed
+
+    for i in range(len(chans)):
+        go(producer(i))
+    received, closed = do(consumer())
+    assert sorted(received) == sorted([(i, i) for i in range(100)] + [(i, i + 1000) for i in range(100)])
+    assert sorted(closed) == list(range(100))
+    for ch in chans:
+        assert ch.recv_nowait() == (True, None, False)
+
+
+def test_select_set_add_remove():
+    ch1 = Chan[str](2)
+    ch2 = Chan[str]()
+    sset = SelectSet()
+    assert sset.select_nowait() == (False, None, None, False)
+
+    ch1.send_nowait('a')
+    ch1.send_nowait('b')
+    sset.add('k1', ch1)
+    sset.add('k2', ch2)
+    assert 'k1' in sset and len(sset) == 2
+    try:
+        sset.add('k1', ch1)
+    except KeyError:
+        pass
+    else:
+        assert False
+
+    # the set holds 'a', 'b' stays in the chan
+    assert sset.remove('k1') == (True, 'a', True)
+    assert ch1.recv_nowait() == (True, 'b', True)
+    assert sset.select_nowait() == (False, None, None, False)
+
+    async def f1():
+        go(ch2.send('c'))
+        return await sset.select()
+
+    assert do(f1()) == ('k2', 'c', True)
+    assert sset.remove('k2') == (False, None, False)
+    assert not ch2.send_nowait('d')
+
+
+def _select_win_gaps(fairness: str, default: bool, rounds: int = 3000):
+    ''' saturate 3 chans and return the gaps, in rounds, between wins of each case
+    '''
+    chans = [Chan[int](1) for _ in range(3)]
+    for ch in chans:
+        ch.send_nowait(0)
+
+    async def f1():
+        last = [-1, -1, -1]
+        gaps: List[List[int]] = [[], [], []]
+        for r in range(rounds):
+            id, x, ok = await select(*chans, default=default, fairness=fairness)
+            gaps[id].append(r - last[id])
+            last[id] = r
+            # keep every case ready
+            chans[id].send_nowait(r)
+        for id in range(3):
+            gaps[id].append(rounds - last[id])
+        return gaps
+
+    return do(f1())
+
+
+def _p99(xs: List[int]) -> int:
+    xs = sorted(xs)
+    return xs[int(len(xs) * 0.99)]
+
+
+def test_select_fairness_latency():
+    for default in (False, True):
+        gaps = _select_win_gaps('ordered', default)
+        # the lowest index always wins, the rest starve
+        assert len(gaps[0]) == 3001 and gaps[1] == [3001] and gaps[2] == [3001]
+
+        gaps = _select_win_gaps('round_robin', default)
+        for g in gaps:
+            assert max(g) <= 3
+
+        gaps = _select_win_gaps('random', default)
+        for g in gaps:
+            assert 800 < len(g) < 1200
+            assert _p99(g) < 20
+
+    try:
+        do(select(Chan(), fairness='unknown')) # type: ignore
+    except ValueError:
+        pass
+    else:
+        assert False
+
+
+def test_selector_fairness():
+    chans = [Chan[int](1) for _ in range(3)]
+    sel = Selector(*chans, fairness='round_robin')
+
+    async def f1():
+        ids = []
+        for r in range(6):
+            for ch in chans:
+                if not len(ch):
+                    ch.send_nowait(r)
+            id, _, _ = await sel.select()
+            ids.append(id)
+        return ids
+
+    assert do(f1()) == [0, 1, 2, 0, 1, 2]
+
+
+def test_chan_cancel_waiters():
+    ch = Chan[int]()
+
+    async def f1():
+        # heavy timeout churn leaves nothing behind
+        for _ in range(200):
+            try:
+                await asyncio.wait_for(ch.recv(), 0)
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await asyncio.wait_for(ch.send(0), 0)
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await asyncio.wait_for(ch.send_many([0, 1]), 0)
+            except asyncio.TimeoutError:
+                pass
+        # none of the cancelled receivers takes an item, nor left one behind
+        assert ch.recv_nowait() == (False, None, False)
+
+        x = go(ch.recv())
+        assert ch.send_nowait(1) == False
+        await asyncio.sleep(0)
+        assert ch.send_nowait(1)
+        assert await x == (1, True)
+
+    do(f1())
+
+
+def test_chan_cancel_after_put():
+    ch1 = Chan[int]()
+    ch2 = Chan[int](1)
+
+    async def f1():
+        # the item was put, but the receiver is cancelled before it runs
+        t = asyncio.ensure_future(ch1.recv())
+        await asyncio.sleep(0)
+        assert ch1.send_nowait(1)
+        t.cancel()
+        await asyncio.sleep(0)
+        assert t.cancelled()
+        assert ch1.recv_nowait() == (True, 1, True)
+
+        t = asyncio.ensure_future(select(ch1, ch2))
+        await asyncio.sleep(0)
+        assert ch2.send_nowait(2)
+        t.cancel()
+        await asyncio.sleep(0)
+        assert t.cancelled()
+        assert ch2.recv_nowait() == (True, 2, True)
+
+        # same for a put from another thread, still on its way to the loop
+        t = asyncio.ensure_future(ch1.recv())
+        await asyncio.sleep(0)
+        L = []
+        th = threading.Thread(target=lambda: L.append(ch1.send_nowait(3)))
+        th.start()
+        th.join()
+        t.cancel()
+        assert L == [True]
+        await asyncio.sleep(0.01)
+        assert t.cancelled()
+        assert ch1.recv_nowait() == (True, 3, True)
+
+        # given back, then closed, still received before the close is seen
+        for close_first in (False, True):
+            ch = Chan[int]()
+            t = asyncio.ensure_future(ch.recv())
+            await asyncio.sleep(0)
+            assert ch.send_nowait(4)
+            t.cancel()
+            if close_first:
+                ch.close()
+            await asyncio.sleep(0)
+            assert t.cancelled()
+            ch.close()
+            assert ch.recv_nowait() == (True, 4, True)
+            assert ch.recv_nowait() == (True, None, False)
+
+        ch = Chan[int]()
+        t = asyncio.ensure_future(ch.recv())
+        await asyncio.sleep(0)
+        assert ch.send_nowait(5)
+        t.cancel()
+        await asyncio.sleep(0)
+        ch.close()
+        assert await select(ch) == (0, 5, True)
+        assert await select(ch) == (0, None, False)
+
+    do(f1())
+
+
+def test_chan_timeout():
+    ch = Chan[int]()
+
+    async def f1():
+        try:
+            await ch.recv(timeout=0.001)
+        except ChanTimeoutError:
+            pass
+        else:
+            assert False
+        try:
+            await ch.send(1, timeout=0.001)
+        except ChanTimeoutError:
+            pass
+        else:
+            assert False
+        assert not ch.send_nowait(1) and ch.recv_nowait() == (False, None, False)
+
+        go(ch.send(2))
+        assert await ch.recv(timeout=1) == (2, True)
+        try:
+            await nilchan.recv(timeout=0.001)
+        except ChanTimeoutError:
+            pass
+        else:
+            assert False
+
+    do(f1())
+
+
+def test_chan_recv_send_ctx():
+    ch = Chan[int]()
+
+    async def f1():
+        ctx, cancel = WithCancel(Background())
+        x = go(ch.recv(ctx=ctx))
+        await asyncio.sleep(0.001)
+        # cancel from another thread
+        await asyncio.get_running_loop().run_in_executor(None, cancel)
+        try:
+            await x
+        except type(Canceled):
+            pass
+        else:
+            assert False
+        assert not ch.send_nowait(1)
+
+        ctx, _ = WithTimeout(Background(), 0.001)
+        try:
+            await ch.send(1, ctx=ctx)
+        except type(DeadlineExceeded):
+            pass
+        else:
+            assert False
+        assert ch.recv_nowait() == (False, None, False)
+
+        # already done
+        try:
+            await ch.recv(ctx=ctx)
+        except type(DeadlineExceeded):
+            pass
+        else:
+            assert False
+
+        ctx, cancel = WithCancel(Background())
+        go(ch.send(3))
+        assert await ch.recv(timeout=1, ctx=ctx) == (3, True)
+        cancel()
+
+    do(f1())
+
+
+def test_chan_batches():
+    ch = Chan[int](10)
+
+    async def produce():
+        # a full batch at once
+        ch.send_many_nowait(range(5))
+        await asyncio.sleep(0.05)
+        # a partial batch, flushed by time
+        await ch.send_many([5, 6])
+        await asyncio.sleep(0.05)
+        await ch.send(7)
+        ch.close()
+
+    async def f1():
+        go(produce())
+        batches = []
+        start = time.time()
+        async for batch in ch.batches(4, 0.01):
+            batches.append(batch)
+        return batches, time.time() - start
+
+    batches, elapsed = do(f1())
+    assert batches == [[0, 1, 2, 3], [4], [5, 6], [7]]
+    assert elapsed < 1
+
+    # cancelled with a batch partly filled, its items go back in order
+    ch = Chan[int](10)
+
+    async def f2():
+        ch.send_many_nowait(range(3))
+        try:
+            await asyncio.wait_for(ch.batches(10, 5.0).__anext__(), 0.05)
+        except asyncio.TimeoutError:
+            pass
+        else:
+            assert False
+        assert len(ch) == 3
+        assert await ch.recv_many(10) == ([0, 1, 2], True)
+
+    do(f2())
+
+
+def test_chan_typed():
+    ch = Chan[float](4, typecode='d')
+
+    async def f1():
+        # wrap the ring around, with blocked writers rotating in
+        for i in range(3):
+            await ch.send(float(i))
+        assert await ch.recv() == (0.0, True)
+        go(ch.send_many([3.0, 4.0, 5.0, 6.0]))
+        await asyncio.sleep(0.01)
+        out = array('d', bytes(8 * 8))
+        n, ok = await ch.recv_many_into(out)
+        assert ok and out[:n].tolist() == [1.0, 2.0, 3.0, 4.0, 5.0, 6.0][:n]
+        while n < 6:
+            k, ok = await ch.recv_many_into(memoryview(out)[n:])
+            assert ok
+            n += k
+        assert out[:6].tolist() == [1.0, 2.0, 3.0, 4.0, 5.0, 6.0]
+
+        # a receiver waiting on an empty chan
+        go(ch.send(7.0))
+        n, ok = await ch.recv_many_into(out)
+        assert (n, ok, out[0]) == (1, True, 7.0)
+
+        ch.send_many_nowait([8.0, 9.0])
+        ch.close()
+        assert ch.recv_many_into_nowait(out) == (2, True)
+        assert ch.recv_many_into_nowait(out) == (0, False)
+
+    do(f1())
+
+    # a bad item fails its sender, before it is queued or handed off
+    ch = Chan[float](2, typecode='d')
+
+    async def f2():
+        assert ch.send_nowait(1) and await ch.recv() == (1.0, True)
+        await ch.send(1.0)
+        await ch.send(2.0)
+        for f in (
+            lambda: ch.send('oops'),
+            lambda: ch.send_many([3.0, 'oops']),
+            lambda: select(ch.case_send('oops')),
+        ):
+            try:
+                await f()
+            except TypeError:
+                pass
+            else:
+                assert False
+        for f in (lambda: ch.send_nowait('oops'), lambda: ch.send_many_nowait(['oops'])):
+            try:
+                f()
+            except TypeError:
+                pass
+            else:
+                assert False
+        assert await ch.recv_many(4) == ([1.0, 2.0], True)
+        assert ch.recv_nowait() == (False, None, False)
+
+    do(f2())
+
+    try:
+        ch.recv_many_into_nowait(array('i', [0]))
+    except TypeError:
+        pass
+    else:
+        assert False
+    # the format char may differ for items of the same kind and size, as numpy's int64 'l'
+    ch = Chan[int](2, typecode='q')
+    ch.send_many_nowait([1, -2])
+    try:
+        ch.recv_many_into_nowait(array('d', [0.0]))
+    except TypeError:
+        pass
+    else:
+        assert False
+    for typecode in 'lq':
+        if array(typecode).itemsize == 8:
+            out = array(typecode, [0])
+            assert ch.recv_many_into_nowait(out) == (1, True) and out[0] in (1, -2)
+    try:
+        Chan[int](0, typecode='i')
+    except ValueError:
+        pass
+    else:
+        assert False
+    try:
+        Chan[int](1).recv_many_into_nowait(array('i', [0]))
+    except TypeError:
+        pass
+    else:
+        assert False
+
+
+def test_chan_typed_memory():
+    n = 10000
+
+    def measure(make: Callable[[], Chan[float]]) -> int:
+        # from before the chan is built, so its storage counts too
+        tracemalloc.start()
+        try:
+            before, _ = tracemalloc.get_traced_memory()
+            ch = make()
+            for i in range(n):
+                ch.send_nowait(i + 0.5)
+            after, _ = tracemalloc.get_traced_memory()
+            assert len(ch) == n
+            return after - before
+        finally:
+            tracemalloc.stop()
+
+    boxed = measure(lambda: Chan[float](n))
+    typed = measure(lambda: Chan[float](n, typecode='d'))
+    # 8 bytes an item against a 24 byte float and an 8 byte slot for it
+    assert typed < boxed / 3
+
+
+def test_pipe():
+    pipe = Pipe(8)
+    data = bytes(range(100))
+
+    async def produce():
+        # writes larger than the capacity go in pieces, and never interleave
+        await pipe.write(data[:50])
+        await pipe.write(memoryview(data)[50:])
+        pipe.close()
+
+    async def f1():
+        go(produce())
+        got = bytearray()
+        buf = bytearray(5)
+        while True:
+            n = await pipe.read_into(buf)
+            if n == 0:
+                break
+            assert len(pipe) <= pipe.capacity()
+            got += buf[:n]
+        assert got == data
+        assert await pipe.read(4) == b''
+        try:
+            await pipe.write(b'x')
+        except ChanClosedError:
+            pass
+        else:
+            assert False
+
+    do(f1())
+
+
+def test_pipe_backpressure():
+    pipe = Pipe(4)
+
+    async def f1():
+        await pipe.write(b'abc')
+        task = go(pipe.write(b'defg'))
+        await asyncio.sleep(0.01)
+        # only one byte of room
+        assert not task.done() and len(pipe) == 4
+        assert await pipe.read(2) == b'ab'
+        assert await pipe.read(10) == b'cd'
+        await task
+        assert await pipe.read(10) == b'efg'
+
+        # a cancelled reader leaves the data to others
+        reader = go(pipe.read(1))
+        await asyncio.sleep(0.01)
+        reader.cancel()
+        await pipe.write(b'h')
+        assert await pipe.read(1) == b'h'
+
+    do(f1())
+
+
+def test_pipe_select():
+    pipe = Pipe(4)
+    ch = Chan[int]()
+
+    async def f1():
+        # ready cases
+        id, item, ok = await select(ch, pipe.case_write(b'ab'))
+        assert (id, item, ok) == (1, b'ab', True)
+        id, item, ok = await select(pipe.case_write(b'cde'), pipe.case_read(8))
+        assert (id, item, ok) == (1, b'ab', True)
+
+        # blocking cases
+        go(pipe.write(b'xyz'))
+        id, item, ok = await select(ch, pipe.case_read(2))
+        assert (id, item, ok) == (1, b'xy', True)
+        assert await pipe.read(8) == b'z'
+
+        selector = Selector(ch, pipe.case_write(b'1234'))
+        assert await selector.select() == (1, b'1234', True)
+        # the pipe is full now
+        go(ch.send(1))
+        assert await selector.select() == (0, 1, True)
+        task = go(select(pipe.case_write(b'5')))
+        await asyncio.sleep(0.01)
+        assert not task.done()
+        assert await pipe.read(1) == b'1'
+        assert await task == (0, b'5', True)
+
+        try:
+            pipe.case_write(b'12345')
+        except ValueError:
+            pass
+        else:
+            assert False
+
+        pipe.close()
+        assert await pipe.read(8) == b'2345'
+        assert await select(pipe.case_read(1)) == (0, b'', False)
+
+    do(f1())
+
+
+def test_pipe_cross_thread():
+    pipe = Pipe(16)
+
+    def produce():
+        async def f():
+            for i in range(200):
+                await pipe.write(bytes([i]) * 7)
+            pipe.close()
+        asyncio.run(f())
+
+    async def f1():
+        t = threading.Thread(target=produce)
+        t.start()
+        got = bytearray()
+        while True:
+            _, data, ok = await select(pipe.case_read(5))
+            if not ok:
+                break
+            got += data
+        t.join()
+        return bytes(got)
+
+    assert do(f1()) == b''.join(bytes([i]) * 7 for i in range(200))
+
+
+def test_chan_sync():
+    ch = Chan[int]()
+    out = Chan[int](100)
+
+    async def f1():
+        async for i in ch:
+            await out.send(i)
+        out.close()
+
+    go(f1())
+    # a plain thread against a goroutine
+    for i in range(100):
+        ch.send_sync(i)
+    ch.close()
+    got: List[int] = []
+    while True:
+        items, ok = out.recv_many_sync(1000)
+        if not ok:
+            break
+        got.extend(items)
+    assert got == list(range(100))
+    assert out.recv_sync() == (None, False)
+    assert out.recv_many_sync(10) == ([], False)
+    try:
+        ch.send_sync(1)
+    except ChanClosedError:
+        pass
+    else:
+        assert False
+
+    ch = Chan[int]()
+    for f in (lambda: ch.send_sync(1, timeout=0.01), lambda: ch.recv_sync(timeout=0.01)):
+        try:
+            f()
+        except ChanTimeoutError:
+            pass
+        else:
+            assert False
+        assert not ch.send_nowait(1) and ch.recv_nowait() == (False, None, False)
+
+    # a thread blocked on send is released by a goroutine receiving, or by close
+    def produce():
+        for i in range(10):
+            ch.send_sync(i)
+        try:
+            ch.send_sync(10)
+        except ChanClosedError:
+            pass
+
+    t = threading.Thread(target=produce)
+    t.start()
+
+    async def f2():
+        got = [(await ch.recv())[0] for _ in range(10)]
+        # give the thread time to block on its last send
+        await asyncio.sleep(0.01)
+        ch.close()
+        return got
+
+    assert do(f2()) == list(range(10))
+    t.join()
+
+    ch = Chan[int](10, loop_affine=False)
+    t = threading.Thread(target=lambda: (time.sleep(0.01), ch.send_many_nowait(range(5))))
+    t.start()
+    assert ch.recv_many_sync(10) == (list(range(5)), True)
+    t.join()
+    try:
+        ch.recv_many_sync(0)
+    except ValueError:
+        pass
+    else:
+        assert False
+
+    pch = PriorityChan[int](levels=2)
+    go(pch.recv())
+    pch.send_sync(1, priority=1)
+    try:
+        nilchan.recv_sync(timeout=0.01)
+    except ChanTimeoutError:
+        pass
+    else:
+        assert False
+
+    async def f3():
+        ch.send_sync(1)
+
+    try:
+        do(f3())
+    except RuntimeError:
+        pass
+    else:
+        assert False
+
+
+def test_chan_weighted():
+    ch = Chan[bytes](max_bytes=10, sizeof=len)
+
+    async def f1():
+        await ch.send(b'1234')
+        await ch.send(b'567')
+        assert (len(ch), ch.weight()) == (2, 7)
+        assert ch
+
+        # a big one waits, and a small one queues behind it
+        big = go(ch.send(b'abcdef'))
+        await asyncio.sleep(0.01)
+        assert not ch.send_nowait(b'x')
+        small = go(ch.send(b'y'))
+        await asyncio.sleep(0.01)
+        assert not big.done() and not small.done()
+        assert await ch.recv() == (b'1234', True)
+        await big
+        await small
+        assert (len(ch), ch.weight()) == (3, 10)
+        assert await ch.recv_many(3) == ([b'567', b'abcdef', b'y'], True)
+        assert ch.weight() == 0
+
+        # heavier than the limit, still goes into an empty buffer
+        await ch.send(b'0' * 20)
+        task = go(ch.send(b'z'))
+        await asyncio.sleep(0.01)
+        assert not task.done()
+        assert await ch.recv() == (b'0' * 20, True)
+        await task
+        assert await ch.recv() == (b'z', True)
+
+        # a cancelled head writer lets the next one in
+        await ch.send(b'123456789')
+        big = go(ch.send(b'abcdef'))
+        await asyncio.sleep(0.01)
+        small = go(ch.send(b'y'))
+        await asyncio.sleep(0.01)
+        big.cancel()
+        await asyncio.sleep(0.01)
+        assert small.done()
+        assert (len(ch), ch.weight()) == (2, 10)
+
+    do(f1())
+
+
+def test_chan_weighted_select():
+    ch = Chan[bytes](max_bytes=4, sizeof=len)
+    other = Chan[int]()
+
+    async def f1():
+        assert await select(ch.case_send(b'abc'), other) == (0, b'abc', True)
+        task = go(select(ch.case_send(b'de'), other))
+        await asyncio.sleep(0.01)
+        assert not task.done()
+        assert await select(ch) == (0, b'abc', True)
+        assert await task == (0, b'de', True)
+        assert ch.weight() == 2
+
+    do(f1())
+
+
+def test_chan_overflow():
+    async def f1():
+        newest = Chan[int](2, overflow='drop_newest')
+        oldest = Chan[int](2, overflow='drop_oldest')
+        for i in range(5):
+            await newest.send(i)
+            assert oldest.send_nowait(i)
+        assert newest.recv_many_nowait(5) == ([0, 1], True)
+        assert oldest.recv_many_nowait(5) == ([3, 4], True)
+        assert (newest.dropped(), oldest.dropped()) == (3, 3)
+
+        # a select send never blocks either
+        await oldest.send_many([5, 6])
+        assert await select(oldest.case_send(7)) == (0, 7, True)
+        assert oldest.recv_many_nowait(5) == ([6, 7], True)
+
+        # weighted, evicting as much as needed
+        ch = Chan[bytes](max_bytes=5, sizeof=len, overflow='drop_oldest')
+        await ch.send_many([b'a', b'b', b'cd'])
+        await ch.send(b'efg')
+        assert (ch.recv_many_nowait(5), ch.dropped()) == (([b'cd', b'efg'], True), 2)
+
+    do(f1())
+
+    for kwargs in ({'overflow': 'drop_newest'}, {'buffsize': 1, 'overflow': 'drop'}):
+        try:
+            Chan[int](**kwargs) # type: ignore
+        except ValueError:
+            pass
+        else:
+            assert False
+
+
+def test_chan_handoff():
+    async def f1():
+        for handoff in (False, True):
+            ch = Chan[int](handoff=handoff)
+            got: List[int] = []
+
+            async def recv():
+                item, _ = await ch.recv()
+                got.append(item) # type: ignore
+
+            go(recv())
+            await asyncio.sleep(0)
+            await ch.send(1)
+            # the reader has already run when a handoff send returns
+            assert got == ([1] if handoff else [])
+            await asyncio.sleep(0)
+            assert got == [1]
+
+        # no reader waiting, so a plain blocking send
+        ch = Chan[int](handoff=True)
+        go(ch.send(2))
+        assert await ch.recv() == (2, True)
+
+    do(f1())
+
+    try:
+        Chan[int](1, handoff=True)
+    except ValueError:
+        pass
+    else:
+        assert False
+
+
+def test_broadcast():
+    bc = Broadcast[int](2)
+
+    async def consume(sub) -> List[int]:
+        return [x async for x in sub]
+
+    async def f1():
+        subs = [bc.subscribe() for _ in range(3)]
+        tasks = [go(consume(sub)) for sub in subs]
+        for i in range(10):
+            # blocks on the slowest subscriber
+            await bc.send(i)
+        bc.close()
+        results = [await t for t in tasks]
+        assert results == [list(range(10))] * 3
+        assert bc.subscribe().recv_nowait() == (True, None, False)
+
+    do(f1())
+
+
+def test_broadcast_slow_policies():
+    async def f1():
+        bc = Broadcast[int](2)
+        sub = bc.subscribe()
+        await bc.send(0)
+        await bc.send(1)
+        task = go(bc.send(2))
+        await asyncio.sleep(0.01)
+        assert not task.done() and not bc.send_nowait(3)
+        # a subscriber leaving gives its slots back
+        sub.close()
+        await task
+
+        bc = Broadcast[int](2, slow='drop')
+        fast, slow = bc.subscribe(), bc.subscribe()
+        for i in range(5):
+            assert bc.send_nowait(i)
+            assert await fast.recv() == (i, True)
+        assert await slow.recv() == (3, True)
+        assert slow.dropped() == 3
+
+        bc = Broadcast[int](2, slow='disconnect')
+        fast, slow = bc.subscribe(), bc.subscribe()
+        for i in range(3):
+            assert bc.send_nowait(i)
+            assert await fast.recv() == (i, True)
+        assert await slow.recv() == (None, False)
+        assert slow.disconnected() and not fast.disconnected()
+        assert bc.subscribers() == 1
+
+        # the only subscriber disconnected leaves the ring empty for later ones
+        bc = Broadcast[int](2, slow='disconnect')
+        s1 = bc.subscribe()
+        for i in range(3):
+            assert bc.send_nowait(i)
+        assert s1.disconnected() and bc.subscribers() == 0
+        s2 = bc.subscribe()
+        for i in range(3, 6):
+            assert bc.send_nowait(i)
+        assert await s2.recv() == (None, False)
+        assert s2.disconnected()
+        s3 = bc.subscribe()
+        assert bc.send_nowait(6)
+        assert await s3.recv() == (6, True)
+
+    do(f1())
+
+
+def test_broadcast_select():
+    bc = Broadcast[int](4)
+    ch = Chan[int]()
+
+    async def f1():
+        sub1, sub2 = bc.subscribe(), bc.subscribe()
+        task = go(select(ch, sub1))
+        await asyncio.sleep(0.01)
+        assert not task.done()
+        await bc.send(1)
+        assert await task == (1, 1, True)
+        assert await select(sub2, ch) == (0, 1, True)
+
+        # an item taken by a cancelled select is read again
+        task = go(select(sub1))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        await bc.send(2)
+        assert await sub1.recv() == (2, True)
+
+        selector = Selector(sub1, sub2)
+        await bc.send(3)
+        assert await selector.select() == (0, 3, True)
+        assert await selector.select() == (1, 2, True)
+        bc.close()
+        assert await selector.select() == (0, None, False)
+
+    do(f1())
+
+
+def test_priority_chan():
+    ch = PriorityChan[str](3, 4)
+
+    async def f1():
+        for item, priority in [('a', 0), ('b', 1), ('c', 0), ('d', 2)]:
+            await ch.send(item, priority=priority)
+        # blocked senders are taken by priority too
+        low = go(ch.send('e', priority=0))
+        high = go(ch.send('f', priority=2))
+        await asyncio.sleep(0.01)
+        got = [(await ch.recv())[0] for _ in range(6)]
+        assert got == ['d', 'f', 'b', 'a', 'c', 'e']
+        await low
+        await high
+
+        assert ch.send_many_nowait(['x', 'y'], priority=1) == 2
+        assert await select(ch.case_send('z', priority=2)) == (0, 'z', True)
+        assert ch.recv_many_nowait(5) == (['z', 'x', 'y'], True)
+
+        task = go(select(ch, After(1)))
+        await asyncio.sleep(0.01)
+        await ch.send('g', priority=1)
+        assert await task == (0, 'g', True)
+
+        await ch.send('h', priority=0)
+        ch.close()
+        assert await ch.recv() == ('h', True)
+        assert await select(ch) == (0, None, False)
+        try:
+            await ch.send('i')
+        except ChanClosedError:
+            pass
+        else:
+            assert False
+
+    do(f1())
+
+    try:
+        ch.send_nowait('x', priority=3)
+    except ValueError:
+        pass
+    else:
+        assert False
+    for priority in (0.5, True, '1'):
+        try:
+            ch.send_nowait('x', priority=priority) # type: ignore
+        except TypeError:
+            pass
+        else:
+            assert False
+    try:
+        # a timeout where a plain chan takes it
+        ch.send_nowait('x', 1) # type: ignore
+    except TypeError:
+        pass
+    else:
+        assert False
+
+
+def test_priority_chan_give_back():
+    ch = PriorityChan[str](3, 4)
+
+    async def f1():
+        # a low item handed to a receiver that is cancelled goes back behind the high ones
+        task = go(ch.recv())
+        await asyncio.sleep(0.01)
+        ch.send_nowait('a', priority=0)
+        ch.send_nowait('b', priority=2)
+        task.cancel()
+        await asyncio.sleep(0.01)
+        ch.send_nowait('c', priority=0)
+        assert ch.recv_many_nowait(5) == (['b', 'a', 'c'], True)
+
+        # and the same for a select
+        task = go(select(ch, After(1)))
+        await asyncio.sleep(0.01)
+        ch.send_nowait('a', priority=0)
+        ch.send_nowait('b', priority=2)
+        task.cancel()
+        await asyncio.sleep(0.01)
+        assert ch.recv_many_nowait(5) == (['b', 'a'], True)
+
+    do(f1())
+
+
+def test_priority_chan_unbuffered():
+    ch = PriorityChan[int](2)
+
+    async def f1():
+        go(ch.send(1, priority=0))
+        await asyncio.sleep(0.01)
+        go(ch.send(2, priority=1))
+        await asyncio.sleep(0.01)
+        assert await ch.recv() == (2, True)
+        assert await ch.recv() == (1, True)
+
+    do(f1())
+
+
+def test_signal():
+    sig = Signal[int]()
+
+    async def f1():
+        assert sig.recv_nowait() == (False, None, False)
+        assert sig.send_nowait(1)
+        # holds one item only
+        assert not sig.send_nowait(2)
+        assert await sig.recv() == (1, True)
+        assert sig.recv_nowait() == (False, None, False)
+
+        # taken once, and ready to be sent again
+        task = go(sig.recv())
+        await asyncio.sleep(0.01)
+        assert sig.send_nowait(3)
+        assert await task == (3, True)
+
+        try:
+            await sig.recv(timeout=0.01)
+        except ChanTimeoutError:
+            pass
+        else:
+            assert False
+        # the timed out reader doesn't take the next item
+        assert sig.send_nowait(5) and len(sig) == 1
+        assert sig.recv_nowait() == (True, 5, True)
+
+        # closing wakes every reader, after the held item
+        tasks = [go(sig.recv()) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        sig.send_nowait(4)
+        sig.close()
+        assert sorted(await asyncio.gather(*tasks), key=str) == [(4, True), (None, False), (None, False)]
+        assert await sig.recv() == (None, False)
+        assert [i async for i in sig] == []
+        try:
+            sig.send_nowait(5)
+        except ChanClosedError:
+            pass
+        else:
+            assert False
+
+    do(f1())
+
+
+def test_signal_select():
+    sig = Signal[int]()
+    ch = Chan[int]()
+
+    async def f1():
+        sig.send_nowait(1)
+        assert await select(ch, sig) == (1, 1, True)
+
+        task = go(select(ch, sig))
+        await asyncio.sleep(0.01)
+        sig.send_nowait(2)
+        assert await task == (1, 2, True)
+
+        # from another thread
+        t = threading.Timer(0.01, sig.send_nowait, (3,))
+        t.start()
+        assert await Selector(ch, sig).select() == (1, 3, True)
+        t.join()
+
+        # a cancelled select gives the item back
+        task = go(select(ch, sig))
+        await asyncio.sleep(0.01)
+        sig.send_nowait(4)
+        task.cancel()
+        await asyncio.sleep(0.01)
+        assert sig.recv_nowait() == (True, 4, True)
+
+        # unless one was sent meanwhile, which supersedes it
+        task = go(sig.recv())
+        await asyncio.sleep(0.01)
+        sig.send_nowait(5)
+        task.cancel()
+        assert len(sig) == 0 and sig.send_nowait(6) and len(sig) == 1
+        await asyncio.sleep(0.01)
+        assert sig.recv_nowait() == (True, 6, True)
+        assert sig.recv_nowait() == (False, None, False)
+
+        # selected on as a case, as done() and After() were chans
+        ctx, cancel = WithCancel(Background())
+        cancel()
+        assert await select(ch.case_recv(), ctx.done().case_recv()) == (1, None, False)
+        id, t, ok = await select(ch.case_recv(), After(0.01).case_recv())
+        assert id == 1 and isinstance(t, float) and ok
+
+        sig.close()
+        assert await select(ch, sig) == (1, None, False)
+
+    do(f1())
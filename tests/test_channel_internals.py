@@ -0,0 +1,175 @@
+
+# White-box tests: these look at a chan's private waiter lists and select groups to
+# check that nothing is left registered, which the public API cannot observe. They
+# follow the internals, so expect to change them along with pygoic/channel.py.
+import asyncio
+import threading
+from pygoic import go, do
+from pygoic import Chan, Signal, select, Selector, SelectSet
+from pygoic import ChanTimeoutError
+from pygoic.channel import _MutexGroup
+from pygoic import Background, Canceled, DeadlineExceeded, WithCancel, WithTimeout
+
+
+def test_select_leaves_no_waiters():
+    ch0 = Chan[str]()
+    ch1 = Chan[str](1)
+
+    async def f1():
+        # ready at once, nothing registered on the other chans
+        ch1.send_nowait('1')
+        assert await select(ch0, ch1) == (1, '1', True)
+        assert not ch0._readers and not ch0._writers
+
+        # a Selector that blocked, then won on one chan
+        sel = Selector(ch0, ch1.case_send('2'))
+        go(ch0.send('3'))
+        ch1.send_nowait('x')
+        assert await sel.select() == (0, '3', True)
+        assert not ch0._writers and not ch1._writers
+        assert ch1.recv_nowait() == (True, 'x', True)
+
+        sset = SelectSet()
+        sset.add('k', ch0)
+        go(ch0.send('4'))
+        assert await sset.select() == ('k', '4', True)
+        assert sset.remove('k') == (False, None, False)
+        assert not ch0._readers
+
+    do(f1())
+
+
+def test_chan_cancel_unlinks_waiters():
+    ch = Chan[int]()
+
+    async def f1():
+        # heavy timeout churn leaves nothing behind
+        for _ in range(200):
+            for aw in (ch.recv, lambda: ch.send(0), lambda: ch.send_many([0, 1])):
+                try:
+                    await asyncio.wait_for(aw(), 0)
+                except asyncio.TimeoutError:
+                    pass
+        assert len(ch._readers) == 0 and len(ch._writers) == 0
+
+        for f in (lambda: ch.recv(timeout=0.001), lambda: ch.send(1, timeout=0.001)):
+            try:
+                await f()
+            except ChanTimeoutError:
+                pass
+            else:
+                assert False
+        assert not ch._readers and not ch._writers
+
+    do(f1())
+
+    for f in (lambda: ch.send_sync(1, timeout=0.01), lambda: ch.recv_sync(timeout=0.01)):
+        try:
+            f()
+        except ChanTimeoutError:
+            pass
+        else:
+            assert False
+        assert not ch._readers and not ch._writers
+
+
+def test_chan_ctx_unlinks_waiters():
+    ch = Chan[int]()
+
+    async def f1():
+        ctx, cancel = WithCancel(Background())
+        x = go(ch.recv(ctx=ctx))
+        await asyncio.sleep(0.001)
+        cancel()
+        try:
+            await x
+        except type(Canceled):
+            pass
+        else:
+            assert False
+        assert not ch._readers
+        assert not ctx.done()._readers
+
+        ctx, _ = WithTimeout(Background(), 0.001)
+        try:
+            await ch.send(1, ctx=ctx)
+        except type(DeadlineExceeded):
+            pass
+        else:
+            assert False
+        assert not ch._writers
+
+        ctx, cancel = WithCancel(Background())
+        go(ch.send(3))
+        assert await ch.recv(timeout=1, ctx=ctx) == (3, True)
+        assert not ctx.done()._readers
+        cancel()
+
+    do(f1())
+
+
+def test_signal_unlinks_waiters():
+    sig = Signal[int]()
+
+    async def f1():
+        try:
+            await sig.recv(timeout=0.01)
+        except ChanTimeoutError:
+            pass
+        else:
+            assert False
+        assert not sig._readers
+
+    do(f1())
+
+
+def test_select_lazy_release():
+    quit = Chan[None]()
+    ch = Chan[int]()
+    n = 1000
+
+    async def produce():
+        for i in range(n):
+            await ch.send(i)
+
+    async def f1():
+        go(produce())
+        for i in range(n):
+            assert await select(quit, ch) == (1, i, True)
+        # unlinked right away while the chan lock is free
+        assert len(quit._readers) == 0
+
+        for i in range(n):
+            group = _MutexGroup()
+            quit._recv_with_mutex(group, 0)
+            with group.getlock():
+                group.set_result(0, None, True)
+            # left behind while another thread holds the lock, swept as they pile up
+            with quit._lock:
+                group.release()
+        stale = len(quit._readers)
+        assert 0 < stale <= 128
+        go(quit.send(None))
+        assert await quit.recv() == (None, True)
+        assert len(quit._readers) < stale
+
+    do(f1())
+
+
+def test_select_group_reset():
+    ch = Chan[int](1)
+
+    async def f1():
+        group = _MutexGroup()
+        # completed from another thread, then cancelled and reused before delivery
+        t = threading.Thread(target=group.set_result, args=(0, 1, True, ch))
+        t.start()
+        t.join()
+        group._future.cancel()
+        group.reset()
+        await asyncio.sleep(0.01)
+        assert not group.done()
+        # the late result went back to its chan, not to the next round
+        assert ch.recv_nowait() == (True, 1, True)
+
+    do(f1())
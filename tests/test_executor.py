@@ -2,9 +2,14 @@
 
 
 import asyncio
+import contextvars
+import sys
+import threading
 import time
-from typing import List
-from pygoic import go, do, delegate
+from typing import List, Set
+from pygoic import go, go_many, do, do_many, delegate
+from pygoic import After, Chan, WaitGroup
+from pygoic.executor import GoroutineExecutor
 
 
 def test_go_basic():
@@ -113,3 +118,256 @@ def test_do_in_coro_with_error():
     else:
         assert False
 
+
+def test_go_sharded():
+    for placement in ('round_robin', 'hash', 'least_loaded'):
+        ex = GoroutineExecutor(4, placement) # type: ignore
+        ch = Chan[int]()
+        wg = WaitGroup()
+        threads: Set[int] = set()
+
+        async def produce(i: int):
+            threads.add(threading.get_ident())
+            await After(0.001).recv()
+            await ch.send(i)
+            wg.done()
+
+        async def f1():
+            wg.add(16)
+            for i in range(16):
+                ex.go(produce(i))
+            got = [(await ch.recv())[0] for _ in range(16)]
+            await wg.wait()
+            return sorted(got) # type: ignore
+
+        assert ex.do(f1()) == list(range(16))
+        # hash keeps the goroutines of one function together
+        assert (len(threads) == 1) == (placement == 'hash')
+        ex.close()
+
+
+def test_go_affinity():
+    ex = GoroutineExecutor(4)
+
+    async def where() -> int:
+        await asyncio.sleep(0)
+        return threading.get_ident()
+
+    async def f1():
+        a = [await ex.go(where(), key='a') for _ in range(8)]
+        rest = await asyncio.gather(*(ex.go(where()) for _ in range(8)))
+        return a, rest
+
+    a, rest = ex.do(f1())
+    assert len(set(a)) == 1 and len(set(rest)) == 4
+    # a goroutine on another loop is awaited from outside too
+    x = ex.go(where())
+    assert ex.do(x) == ex.do(x)
+
+    try:
+        ex.set_loops(2)
+    except RuntimeError:
+        pass
+    else:
+        assert False
+    ex.close()
+
+
+def test_go_many():
+    async def f1(i: int) -> int:
+        await asyncio.sleep(0.001)
+        return i
+
+    assert [do(x) for x in go_many(f1(i) for i in range(10))] == list(range(10))
+
+    async def f2():
+        return [await x for x in go_many(f1(i) for i in range(10))]
+
+    assert do(f2()) == list(range(10))
+
+    ex = GoroutineExecutor(4)
+    assert [ex.do(x) for x in ex.go_many(f1(i) for i in range(10))] == list(range(10))
+    ex.close()
+
+
+def test_do_many():
+    async def f1(i: int) -> int:
+        await asyncio.sleep(0.001)
+        return i
+
+    assert do_many(f1(i) for i in range(10)) == list(range(10))
+    assert do_many([]) == []
+
+    async def f2():
+        raise ValueError('f2')
+
+    try:
+        do_many([f1(0), f2()])
+    except ValueError:
+        pass
+    else:
+        assert False
+
+    ex = GoroutineExecutor(4)
+    assert ex.do_many(f1(i) for i in range(10)) == list(range(10))
+    ex.close()
+
+
+def _square(x: int) -> int:
+    return x * x
+
+
+def _blob(n: int, kind: type = bytes):
+    return kind(i % 251 for i in range(n))
+
+
+def _fail():
+    raise ValueError('fail')
+
+
+def test_delegate_process():
+    ex = GoroutineExecutor()
+    ex.set_process_pool(max_workers=2)
+
+    async def f1():
+        assert await asyncio.gather(*(ex.delegate_process(_square, i) for i in range(4))) == [0, 1, 4, 9]
+        # large ones come back through shared memory, small ones pickled
+        for n in (10, 1 << 20):
+            data = await ex.delegate_process(_blob, n, shared=True)
+            assert type(data) is bytes and data == _blob(n)
+        data = await ex.delegate_process(_blob, 1 << 20, bytearray, shared=True)
+        assert type(data) is bytearray and data == _blob(1 << 20, bytearray)
+        assert await ex.delegate_process(_square, 3, shared=True) == 9
+        for shared in (False, True):
+            try:
+                await ex.delegate_process(_fail, shared=shared)
+            except ValueError:
+                pass
+            else:
+                assert False
+
+    ex.do(f1())
+    try:
+        ex.set_process_pool(max_workers=4)
+    except RuntimeError:
+        pass
+    else:
+        assert False
+    ex.close()
+
+    try:
+        GoroutineExecutor().set_process_pool(start_method='nope')
+    except ValueError:
+        pass
+    else:
+        assert False
+
+
+def test_go_wakeup():
+    ex = GoroutineExecutor()
+    ex._init_worker()
+    loop = ex._loop
+    wakeups: List[int] = []
+    call_soon_threadsafe = loop.call_soon_threadsafe
+
+    def counted(*args):
+        wakeups.append(1)
+        return call_soon_threadsafe(*args)
+
+    loop.call_soon_threadsafe = counted # type: ignore
+
+    async def f1():
+        pass
+
+    async def f2():
+        for _ in range(100):
+            ex.go(f1())
+        return len(wakeups)
+
+    # none from the loop itself, beyond the one for do
+    assert ex.do(f2()) == 1
+    wakeups.clear()
+    # coalesced from another thread
+    futures = [ex.go(f1()) for _ in range(1000)]
+    ex.do(futures[-1])
+    assert len(wakeups) < 500
+    ex.close()
+
+
+def test_go_eager():
+    L: List[str] = []
+    var = contextvars.ContextVar('var', default='caller')
+
+    async def f1() -> str:
+        var.set('f1')
+        L.append('f1_0')
+        return 'f1'
+
+    async def f2() -> str:
+        L.append('f2_0')
+        await asyncio.sleep(0.001)
+        L.append('f2_1')
+        return var.get()
+
+    async def f3():
+        raise ValueError('f3')
+
+    async def f4():
+        await Chan[int]().recv()
+
+    async def f5():
+        # its own task from the first step on, so a timeout there cancels it alone
+        task = asyncio.current_task()
+        await asyncio.sleep(0)
+        return task
+
+    # a plain start before 3.12
+    eager = sys.version_info >= (3, 12)
+
+    async def main():
+        x = go(f1(), eager=True)
+        # ran to the end before go returned
+        assert x.done() == eager and L == (['f1_0'] if eager else []) # type: ignore
+        assert await x == 'f1' and var.get() == 'caller'
+
+        var.set('main')
+        y = go(f2(), eager=True)
+        assert L == (['f1_0', 'f2_0'] if eager else ['f1_0'])
+        assert await y == 'main'
+        assert L == ['f1_0', 'f2_0', 'f2_1']
+
+        z = go(f3(), eager=True)
+        try:
+            await z
+        except ValueError:
+            pass
+        else:
+            assert False
+
+        w = go(f4(), eager=True)
+        await asyncio.sleep(0.001)
+        w.cancel() # type: ignore
+        try:
+            await w
+        except asyncio.CancelledError:
+            pass
+        else:
+            assert False
+
+        u = go(f5(), eager=True)
+        assert await u is u
+
+        # not eager by default
+        v = go(f1())
+        assert not v.done() # type: ignore
+        await v
+
+    do(main())
+
+    ex = GoroutineExecutor(eager=True)
+
+    async def main2():
+        return ex.go(f1()).done() # type: ignore
+
+    assert ex.do(main2()) == eager
+    ex.close()
@@ -59,6 +59,7 @@ def test_timer_reset_done():
     async def f1():
         x, ok = await timer.C.recv()
         assert isinstance(x, float) and ok
+        assert len(timer.C) == 0
         timer.reset(0.001)
         x, ok = await timer.C.recv()
         assert isinstance(x, float) and ok